@@ -1,13 +1,17 @@
+import itertools
 import os
-from datetime import datetime
+import sys
 
+import yaml
 from dbt.config import RuntimeConfig
 import dbt.adapters.factory
+from dbt.adapters.base.impl import GET_CATALOG_MACRO_NAME
 
 import dbt.perf_utils
+import utils.catalog
+import utils.parallel
 import utils.ui
 from utils.logging import logger
-from dbt.task.generate import Catalog, CatalogResults
 from jinja2 import Template
 
 
@@ -20,12 +24,15 @@ models:
     description: 'TODO: Replace me'
     columns:
     {% for col in model_dict['columns'] -%}
-    - name: {{col['name']}}
+    - name: {{col}}
     {% endfor %}
     {% endfor %}
 """
 )
 
+# How long (in seconds) --incremental reuses a catalog snapshot by default
+INCREMENTAL_CACHE_TTL = 60 * 60
+
 
 class BootstrapTask:
     def __init__(self, args):
@@ -36,57 +43,282 @@ class BootstrapTask:
         manifest = dbt.perf_utils.get_full_manifest(self.config)
         return manifest
 
-    def render_relations(self, models):
-        return SCHEMA_YML_TEMPLATE.render(models=models)
+    def get_schema_catalog(self, adapter, manifest, schema):
+        """
+        Run the adapter's catalog query for a single schema. If manifest is
+        None, the adapter's built-in get_catalog macro is used.
+        """
+        information_schema = adapter.Relation.create(
+            database=self.config.credentials.database, schema=schema
+        ).information_schema_only()
+
+        with adapter.connection_named("bootstrap_{}".format(schema)):
+            catalog = adapter.execute_macro(
+                GET_CATALOG_MACRO_NAME,
+                kwargs={"information_schema": information_schema, "schemas": {schema}},
+                manifest=manifest,
+            )
+        return catalog.where(lambda row: str(row["table_schema"]) == schema)
 
-    def write_relation(self, design_file_path, yml):
-        if os.path.isfile(design_file_path):
-            logger.info(
-                utils.ui.yellow(
-                    "Warning: File {} already exists. Skipping".format(design_file_path)
+    def get_catalog(self, adapter, manifest, schemas):
+        """
+        Fetch the catalog for the requested schemas only, one query per schema
+        run in parallel, rather than the catalog of every schema the project
+        knows about. Returns (column_names, rows, failed_schemas), where rows
+        chains the rows of every schema's catalog. The catalogs aren't merged
+        into one table, since agate refuses to merge a column that is inferred
+        as a different type in different schemas (e.g. an all-NULL comment
+        column).
+        """
+        threads = self.args.threads or self.config.threads
+        catalogs = []
+        failed_schemas = []
+        for (schema,), catalog, error in utils.parallel.map_threaded(
+            lambda schema: self.get_schema_catalog(adapter, manifest, schema),
+            [(schema,) for schema in schemas],
+            threads,
+        ):
+            if error is not None:
+                logger.info(
+                    utils.ui.yellow(
+                        "Warning: Could not fetch the catalog for schema {}: {}".format(
+                            schema, error
+                        )
+                    )
                 )
+                failed_schemas.append(schema)
+                continue
+            catalogs.append(catalog)
+
+        if not catalogs:
+            return [], [], failed_schemas
+        rows = itertools.chain.from_iterable(catalog.rows for catalog in catalogs)
+        return catalogs[0].column_names, rows, failed_schemas
+
+    def get_relations_to_design(self, schemas):
+        """
+        Return {schema: {table: [columns]}} for the requested schemas. Fresh
+        catalog snapshots in target/dbt_helper are used where available (see
+        --cache-ttl), and the warehouse is only queried for the rest.
+        """
+        database = self.config.credentials.database
+        ttl = self.args.cache_ttl
+        if ttl is None:
+            ttl = INCREMENTAL_CACHE_TTL if self.args.incremental else 0
+        cache = utils.catalog.CatalogCache(
+            self.config.target_path, "columns", ttl, self.args.refresh
+        )
+
+        relations_to_design = {}
+        schemas_to_fetch = []
+        for schema in schemas:
+            tables = cache.get(database, schema)
+            if tables is None:
+                schemas_to_fetch.append(schema)
+            elif tables:
+                relations_to_design[schema] = tables
+
+        if schemas_to_fetch:
+            # Look up all of the relations in the DB
+            dbt.adapters.factory.register_adapter(self.config)
+            adapter = dbt.adapters.factory.get_adapter(self.config)
+            self.adapter_type = adapter.type()
+            self.adapter = adapter
+            if self.args.skip_parse:
+                # The catalog macro then comes from the adapter's own macros
+                manifest = None
+            else:
+                manifest = self._get_manifest()
+            column_names, rows, failed_schemas = self.get_catalog(
+                adapter, manifest, schemas_to_fetch
             )
-            return
 
-        logger.info("Creating design file: {}".format(design_file_path))
-        with open(design_file_path, "w") as f:
-            f.write(yml)
+            fetched = utils.catalog.group_catalog_columns(column_names, rows)
+            for schema in schemas_to_fetch:
+                if schema in failed_schemas:
+                    continue
+                tables = fetched.get(schema, {})
+                cache.put(database, schema, tables)
+                if tables:
+                    relations_to_design[schema] = tables
 
-    def print_relation(self, yml):
-        logger.info(yml)
+        return dict(sorted(relations_to_design.items()))
 
-    def prep_metadata(self, meta_dict):
-        columns = []
-        for colname in meta_dict["columns"]:
-            column = {}
-            column["name"] = colname
-            columns.append(column)
+    def get_documented_models(self):
+        """
+        Return {(schema, model name): [column names]} for every model
+        described in a .yml file under the project's source paths. The schema
+        is the model's `schema` (or `config: schema`) if it sets one, and
+        otherwise the directory under the source path that the file is in,
+        which is where bootstrap writes it. Names are lowercased.
+        """
+        documented = {}
+        for source_path in self.config.source_paths:
+            for root, _, files in os.walk(source_path):
+                relative_root = os.path.relpath(root, source_path)
+                if relative_root == os.curdir:
+                    directory_schema = None
+                else:
+                    directory_schema = relative_root.split(os.sep)[0]
+                for name in files:
+                    if not name.endswith((".yml", ".yaml")):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        with open(path) as f:
+                            contents = yaml.safe_load(f)
+                    except (IOError, yaml.YAMLError) as e:
+                        logger.info(
+                            utils.ui.yellow(
+                                "Warning: Could not read {}: {}".format(path, e)
+                            )
+                        )
+                        continue
+                    if not isinstance(contents, dict):
+                        continue
+                    for model in contents.get("models") or []:
+                        if not isinstance(model, dict) or "name" not in model:
+                            continue
+                        config = model.get("config")
+                        schema = model.get("schema") or (
+                            config.get("schema") if isinstance(config, dict) else None
+                        )
+                        schema = schema or directory_schema
+                        if schema is None:
+                            continue
+                        key = (schema.lower(), model["name"].lower())
+                        documented[key] = [
+                            column["name"].lower()
+                            for column in model.get("columns") or []
+                            if isinstance(column, dict) and "name" in column
+                        ]
+        return documented
+
+    def diff_relations(self, relations_to_design, documented):
+        """
+        Split relations into the ones that have no documentation yet
+        ({schema: {table: [columns]}}) and a list of changes for documented
+        relations whose columns were added or dropped in the warehouse.
+        """
+        new_relations = {}
+        changes = []
+        for schema, relations in relations_to_design.items():
+            for relation, columns in relations.items():
+                documented_columns = documented.get((schema.lower(), relation.lower()))
+                if documented_columns is None:
+                    new_relations.setdefault(schema, {})[relation] = columns
+                    continue
+
+                added = [c for c in columns if c.lower() not in documented_columns]
+                live_columns = set(c.lower() for c in columns)
+                dropped = [c for c in documented_columns if c not in live_columns]
+                if added or dropped:
+                    changes.append(
+                        {
+                            "schema": schema,
+                            "name": relation,
+                            "added_columns": added,
+                            "dropped_columns": dropped,
+                        }
+                    )
+        return new_relations, changes
+
+    def print_changes(self, changes):
+        for change in changes:
+            logger.info("-" * 20)
+            logger.info(
+                "Changes for relation: {}.{}".format(change["schema"], change["name"])
+            )
+            logger.info("-" * 20)
+            for column in change["added_columns"]:
+                logger.info(utils.ui.green("+ {}".format(column)))
+            for column in change["dropped_columns"]:
+                logger.info(utils.ui.red("- {}".format(column)))
 
-        model = {}
-        model["name"] = meta_dict["metadata"]["name"]
-        if meta_dict["metadata"]["comment"]:
-            description = meta_dict["metadata"]["comment"]
-        else:
-            description = "TODO: Replace me"
+    def stream_relations(self, models, f):
+        """
+        Render the schema.yml for models straight into the file object f. The
+        template is rendered incrementally, so each model block is written as
+        soon as it is produced and the document is never held in memory.
+        """
+        for chunk in SCHEMA_YML_TEMPLATE.generate(models=models):
+            f.write(chunk)
 
-        model["description"] = description
-        model["columns"] = columns
+    def write_design_file(self, design_file_path, models):
+        logger.info("Creating design file: {}".format(design_file_path))
+        with open(design_file_path, "w") as f:
+            self.stream_relations(models, f)
+
+    def skip_design_file(self, design_file_path):
+        logger.info(
+            utils.ui.yellow(
+                "Warning: File {} already exists. Skipping".format(design_file_path)
+            )
+        )
+        self.skipped_files.append(design_file_path)
 
-        return model
+    def write_relation(self, design_file_path, models):
+        if os.path.isfile(design_file_path):
+            self.skip_design_file(design_file_path)
+            return
 
-    def generate_catalog_dict(self, manifest, columns):
+        self.write_design_file(design_file_path, models)
+        self.created_files.append(design_file_path)
+
+    def write_relations(self, schema_path, models):
         """
-        Ported from
-        https://github.com/fishtown-analytics/dbt/blob/dev/octavius-catto/test/unit/test_docs_generate.py
+        Write one design file per relation. Existing files are detected with
+        a single listing of the schema directory, and the files are written
+        on a bounded thread pool, which matters on slow (e.g. network)
+        filesystems.
         """
-        nodes, sources = Catalog(columns).make_unique_id_map(manifest)
-        result = CatalogResults(
-            nodes=nodes,
-            sources=sources,
-            generated_at=datetime.utcnow(),
-            errors=None,
+        existing_files = set(os.listdir(schema_path))
+
+        files_to_write = []
+        for model in models:
+            design_file_name = "{}.yml".format(model["name"])
+            design_file_path = os.path.join(schema_path, design_file_name)
+            if design_file_name in existing_files:
+                self.skip_design_file(design_file_path)
+            else:
+                files_to_write.append((design_file_path, [model]))
+
+        threads = self.args.threads or self.config.threads
+        for (design_file_path, _), _, error in utils.parallel.map_threaded(
+            self.write_design_file, files_to_write, threads
+        ):
+            if error is not None:
+                logger.info(
+                    utils.ui.red(
+                        "Error: Could not write {}: {}".format(design_file_path, error)
+                    )
+                )
+                continue
+            self.created_files.append(design_file_path)
+
+    def print_new_relations(self, design_file_path, models):
+        logger.info(
+            utils.ui.yellow(
+                "Warning: File {} already exists. Add the design for these new "
+                "relations to it:".format(design_file_path)
+            )
         )
-        return result.to_dict(omit_none=False)["nodes"]
+        self.print_relation(models)
+        self.skipped_files.append(design_file_path)
+
+    def log_write_summary(self):
+        logger.info(
+            utils.ui.green(
+                "Created {} design files, skipped {} that already exist.".format(
+                    len(self.created_files), len(self.skipped_files)
+                )
+            )
+        )
+
+    def print_relation(self, models):
+        self.stream_relations(models, sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
 
     def run(self):
         single_file = self.args.single_file
@@ -97,24 +329,7 @@ class BootstrapTask:
         for schema in schemas:
             logger.info("- {}".format(schema))
 
-        # Look up all of the relations in the DB
-        dbt.adapters.factory.register_adapter(self.config)
-        adapter = dbt.adapters.factory.get_adapter(self.config)
-        self.adapter_type = adapter.type()
-        self.adapter = adapter
-        manifest = self._get_manifest()
-        all_relations, exceptions = adapter.get_catalog(manifest)
-
-        selected_relations = all_relations.where(
-            lambda row: row["table_schema"] in schemas
-        )
-
-        zipped_relations = [
-            dict(zip(selected_relations.column_names, row))
-            for row in selected_relations
-        ]
-
-        relations_to_design = self.generate_catalog_dict(manifest, zipped_relations)
+        relations_to_design = self.get_relations_to_design(schemas)
 
         if len(relations_to_design) == 0:
             logger.info(
@@ -125,51 +340,70 @@ class BootstrapTask:
             )
             return {}
 
-        for table_id, relations in relations_to_design.items():
-            all_models = []
-
-            schema = relations["metadata"]["schema"]
-            schema_path = os.path.join(self.config.source_paths[0], schema)
-            if not write_files:
-                pass
-            elif os.path.isdir(schema_path):
-                pass
-            else:
-                os.mkdir(schema_path)
+        changes = []
+        if self.args.incremental:
+            relations_to_design, changes = self.diff_relations(
+                relations_to_design, self.get_documented_models()
+            )
+            self.print_changes(changes)
+            if not relations_to_design and not changes:
+                logger.info(
+                    utils.ui.green(
+                        "All clear! The documentation of the selected schemas "
+                        "matches the database."
+                    )
+                )
 
-            relation = relations["metadata"]["name"]
+        self.created_files = []
+        self.skipped_files = []
+        designed_models = []
+        for schema, relations in relations_to_design.items():
+            all_models = [
+                {"name": relation, "columns": columns}
+                for relation, columns in relations.items()
+            ]
 
-            relation_dict = self.prep_metadata(relations)
-            all_models.append(relation_dict)
+            schema_path = os.path.join(self.config.source_paths[0], schema)
+            if write_files:
+                os.makedirs(schema_path, exist_ok=True)
 
             if not single_file:
                 if not write_files:
-                    logger.info("-" * 20)
-                    logger.info("Design for relation: {}.{}".format(schema, relation))
-                    logger.info("-" * 20)
-                    yml = self.render_relations([relation_dict])
-                    self.print_relation(yml)
+                    for relation_dict in all_models:
+                        logger.info("-" * 20)
+                        logger.info(
+                            "Design for relation: {}.{}".format(
+                                schema, relation_dict["name"]
+                            )
+                        )
+                        logger.info("-" * 20)
+                        self.print_relation([relation_dict])
                 else:
-                    design_file_name = "{}.yml".format(relation)
-                    design_file_path = os.path.join(schema_path, design_file_name)
-                    yml = self.render_relations([relation_dict])
-                    self.write_relation(design_file_path, yml)
+                    self.write_relations(schema_path, all_models)
 
             if single_file:
                 if not write_files:
                     logger.info("-" * 20)
-                    logger.info("Design for schmea: {}".format(schema))
+                    logger.info("Design for schema: {}".format(schema))
                     logger.info("-" * 20)
-                    yml = self.render_relations(all_models)
-                    self.print_relation(yml)
+                    self.print_relation(all_models)
 
                 else:
                     design_file_name = "{}.yml".format(schema)
                     design_file_path = os.path.join(schema_path, design_file_name)
-                    yml = self.render_relations([all_models])
-                    self.write_relation(design_file_path, yml)
+                    if self.args.incremental and os.path.isfile(design_file_path):
+                        # the new relations belong in the existing file, which
+                        # we don't rewrite, so show them instead of dropping them
+                        self.print_new_relations(design_file_path, all_models)
+                    else:
+                        self.write_relation(design_file_path, all_models)
+
+            designed_models.extend(all_models)
+
+        if write_files:
+            self.log_write_summary()
 
-        return all_models
+        return designed_models + changes
 
     def interpret_results(self, results):
         return len(results) != 0
@@ -3,19 +3,209 @@ import dbt.adapters.factory
 from dbt.node_types import NodeType
 
 import dbt.perf_utils
+import utils.catalog
+import utils.parallel
 import utils.ui
 from utils.logging import logger
 
 
+# One query per database that lists the tables and views in every requested
+# schema. These mirror the list_relations_without_caching macros of each
+# adapter so that bulk mode returns the same relations as the per-schema path.
+# Redshift's macro delegates to the postgres one, which reads pg_tables and
+# pg_views rather than information_schema (which only lists the relations the
+# user has privileges on).
+POSTGRES_BULK_RELATIONS_SQL = """
+    select schemaname, tablename, 'table' from pg_catalog.pg_tables
+    where lower(schemaname) in ({schemas})
+    union all
+    select schemaname, viewname, 'view' from pg_catalog.pg_views
+    where lower(schemaname) in ({schemas})
+"""
+
+BULK_RELATIONS_SQL = {
+    "postgres": POSTGRES_BULK_RELATIONS_SQL,
+    "redshift": POSTGRES_BULK_RELATIONS_SQL,
+}
+
+# Adapters whose schema filter above is case-insensitive
+CASE_INSENSITIVE_ADAPTERS = ("postgres", "redshift")
+
+
 class CompareTask:
     def __init__(self, args):
         self.args = args
         self.config = RuntimeConfig.from_args(args)
+        # non-zero if some schemas could not be checked
+        self.exit_code = 0
+        self.failed_schemas = []
 
     def _get_manifest(self):
         manifest = dbt.perf_utils.get_full_manifest(self.config)
         return manifest
 
+    def list_schema_relations(self, adapter, database_name, schema_name):
+        connection_name = "list_{}_{}".format(database_name, schema_name)
+        with adapter.connection_named(connection_name):
+            return adapter.list_relations(database_name, schema_name)
+
+    def map_threaded(self, func, items):
+        threads = self.args.threads or self.config.threads
+        return utils.parallel.map_threaded(func, items, threads)
+
+    def get_database_relations(self, adapter, schemas):
+        """
+        List the relations in every schema, fanning the metadata queries out
+        over a thread pool. A failure in one schema is reported without
+        aborting the others. Returns the relations and the failed schemas.
+        """
+        db_relations = []
+        failed_schemas = []
+        for (database_name, schema_name), relations, error in self.map_threaded(
+            lambda database_name, schema_name: self.list_schema_relations(
+                adapter, database_name, schema_name
+            ),
+            sorted(schemas),
+        ):
+            if error is not None:
+                logger.info(
+                    utils.ui.yellow(
+                        "Warning: Could not list the relations in {}.{}: {}".format(
+                            database_name, schema_name, error
+                        )
+                    )
+                )
+                failed_schemas.append((database_name, schema_name))
+                continue
+            db_relations.extend(relations)
+        return db_relations, failed_schemas
+
+    def list_database_relations(self, adapter, database_name, schema_names):
+        """Return the relations in schema_names with one catalog query"""
+        case_insensitive = self.adapter_type in CASE_INSENSITIVE_ADAPTERS
+        if case_insensitive:
+            schema_names = [schema_name.lower() for schema_name in schema_names]
+        sql = BULK_RELATIONS_SQL[self.adapter_type].format(
+            database=adapter.quote(database_name),
+            schemas=", ".join(
+                "'{}'".format(schema_name.replace("'", "''"))
+                for schema_name in schema_names
+            ),
+        )
+
+        connection_name = "list_{}".format(database_name)
+        with adapter.connection_named(connection_name):
+            _, table = adapter.execute(sql, fetch=True)
+
+        return [
+            adapter.Relation.create(
+                database=database_name,
+                schema=schema_name,
+                identifier=identifier,
+                type=relation_type,
+            )
+            for schema_name, identifier, relation_type in table
+        ]
+
+    def get_database_relations_bulk(self, adapter, schemas):
+        """
+        List the relations in every schema with a single catalog query per
+        database. Falls back to the per-schema listing on adapters without a
+        bulk query, and for any database whose bulk query fails.
+        """
+        if self.adapter_type not in BULK_RELATIONS_SQL:
+            logger.info(
+                utils.ui.yellow(
+                    "Warning: --bulk is not supported on {}. Listing relations "
+                    "one schema at a time.".format(self.adapter_type)
+                )
+            )
+            return self.get_database_relations(adapter, schemas)
+
+        schemas_by_database = {}
+        for database_name, schema_name in sorted(schemas):
+            schemas_by_database.setdefault(database_name, []).append(schema_name)
+
+        db_relations = []
+        failed_schemas = []
+        for (database_name, schema_names), relations, error in self.map_threaded(
+            lambda database_name, schema_names: self.list_database_relations(
+                adapter, database_name, schema_names
+            ),
+            list(schemas_by_database.items()),
+        ):
+            if error is not None:
+                logger.info(
+                    utils.ui.yellow(
+                        "Warning: Bulk listing of the relations in {} failed ({}). "
+                        "Listing them one schema at a time.".format(
+                            database_name, error
+                        )
+                    )
+                )
+                relations, failed = self.get_database_relations(
+                    adapter,
+                    [(database_name, schema_name) for schema_name in schema_names],
+                )
+                failed_schemas.extend(failed)
+            db_relations.extend(relations)
+        return db_relations, failed_schemas
+
+    def get_cached_relations(self, adapter, schemas):
+        """
+        Return the relations in every schema, reading catalog snapshots from
+        target/dbt_helper when they are younger than --cache-ttl and only
+        querying the database for the remaining schemas. Returns the
+        relations and the schemas that could not be listed.
+        """
+        cache = utils.catalog.CatalogCache(
+            self.config.target_path, "relations", self.args.cache_ttl, self.args.refresh
+        )
+
+        db_relations = []
+        schemas_to_list = []
+        for database_name, schema_name in sorted(schemas):
+            cached = cache.get(database_name, schema_name)
+            if cached is None:
+                schemas_to_list.append((database_name, schema_name))
+                continue
+            for identifier, relation_type in cached:
+                db_relations.append(
+                    adapter.Relation.create(
+                        database=database_name,
+                        schema=schema_name,
+                        identifier=identifier,
+                        type=relation_type,
+                    )
+                )
+
+        if not schemas_to_list:
+            return db_relations, []
+
+        if self.args.bulk:
+            listed, failed_schemas = self.get_database_relations_bulk(
+                adapter, schemas_to_list
+            )
+        else:
+            listed, failed_schemas = self.get_database_relations(
+                adapter, schemas_to_list
+            )
+        db_relations.extend(listed)
+
+        listed_by_schema = {}
+        for relation in listed:
+            key = (str(relation.database).lower(), relation.schema.lower())
+            listed_by_schema.setdefault(key, []).append(
+                [relation.identifier, getattr(relation.type, "value", relation.type)]
+            )
+        for database_name, schema_name in schemas_to_list:
+            if (database_name, schema_name) in failed_schemas:
+                continue
+            key = (str(database_name).lower(), schema_name.lower())
+            cache.put(database_name, schema_name, listed_by_schema.get(key, []))
+
+        return db_relations, failed_schemas
+
     def run(self):
 
         # Look up all of the relations in the DB
@@ -39,9 +229,9 @@ class CompareTask:
                     rel = (node["schema"].lower(), node["alias"].lower())
                     model_relations.add(rel)
 
-        db_relations = []
-        for database_name, schema_name in schemas:
-            db_relations.extend(adapter.list_relations(database_name, schema_name))
+        db_relations, self.failed_schemas = self.get_cached_relations(
+            adapter, schemas
+        )
 
         database_relations = set()
         database_relations_map = dict()
@@ -58,14 +248,29 @@ class CompareTask:
 
         problems = database_relations - model_relations
 
-        if len(problems) == 0:
+        if self.failed_schemas:
+            # relations in these schemas may be stale, so don't give the all-clear
+            self.exit_code = 1
+            logger.info(
+                utils.ui.red(
+                    "Could not check {} schemas: {}".format(
+                        len(self.failed_schemas),
+                        ", ".join(
+                            "{}.{}".format(database_name, schema_name)
+                            for database_name, schema_name in self.failed_schemas
+                        ),
+                    )
+                )
+            )
+        elif len(problems) == 0:
             logger.info(
                 utils.ui.green(
                     "All clear! There are no relations in the checked schemas in the database"
                     "that are not defined in dbt models."
                 )
             )
-        else:
+
+        if problems:
             logger.info(
                 utils.ui.yellow(
                     "Warning: The following relations do not match any models "
@@ -85,4 +290,4 @@ class CompareTask:
         return problem_relation_list
 
     def interpret_results(self, results):
-        return len(results) == 0
+        return len(results) == 0 and not self.failed_schemas
@@ -1,39 +1,30 @@
 import os
-import json
 
-from dbt.config import RuntimeConfig
+from utils.lineage import load_lineage
+from utils.manifest import COMPILATION_MESSAGE, get_target_path
 
 COMPILED_DIR = "compiled"
 RUN_DIR = "run"
-MANIFEST_FILE = "manifest.json"
 DEFAULT_OPEN_COMMAND = "open"
-COMPILATION_MESSAGE = "You may need to run dbt compile first."
 
 
 class FindTask:
     def __init__(self, args):
         self.args = args
-        self.config = RuntimeConfig.from_args(args)
-        self.model_path = self.config.source_paths[0]
-        self.target_path = self.config.target_path
-        self.manifest = self._get_manifest()
+        self.target_path = self._get_target_path()
+        self.lineage = self._get_lineage()
 
-    def _get_manifest(self):
+    def _get_target_path(self):
+        return get_target_path(self.args)
+
+    def _get_lineage(self):
         """
         This subcommand uses the manifest file, whereas other subcommands import
         the manifest object from dbt (which requires the project to be parsed).
         Using the manifest file is significantly faster, so is preferred in this
-        case.
+        case. The lineage read from it is cached under the target directory.
         """
-        manifest_path = os.path.join(self.target_path, MANIFEST_FILE)
-        try:
-            with open(manifest_path) as f:
-                manifest = json.load(f)
-            return manifest
-        except IOError:
-            raise Exception(
-                "Could not find {} file. {}".format(MANIFEST_FILE, COMPILATION_MESSAGE)
-            )
+        return load_lineage(self.target_path)
 
     def _get_model_files(self):
         """Return a dictionary of the form:
@@ -45,24 +36,28 @@ class FindTask:
         """
 
         file_names = {}
-        for node in self.manifest["nodes"].values():
-            if (
-                node["resource_type"] == "model"
-                and node["name"] == self.args.model_name
-            ):
-                root_path = node["root_path"]
-                original_file_path = node["original_file_path"]
-                package_name = node["package_name"]
-
-                file_names["source"] = os.path.join(root_path, original_file_path)
-
-                file_names["compiled"] = os.path.join(
-                    self.target_path, COMPILED_DIR, package_name, original_file_path
-                )
+        index = self.lineage.index
+        unique_ids = index.lookup(self.args.model_name, resource_type="model")
+        if len(unique_ids) > 1:
+            raise Exception(
+                index.ambiguous_name_message(self.args.model_name, unique_ids)
+            )
 
-                file_names["run"] = os.path.join(
-                    self.target_path, RUN_DIR, package_name, original_file_path
-                )
+        for unique_id in unique_ids:
+            node = self.lineage.nodes[unique_id]
+            root_path = node["root_path"]
+            original_file_path = node["original_file_path"]
+            package_name = node["package_name"]
+
+            file_names["source"] = os.path.join(root_path, original_file_path)
+
+            file_names["compiled"] = os.path.join(
+                self.target_path, COMPILED_DIR, package_name, original_file_path
+            )
+
+            file_names["run"] = os.path.join(
+                self.target_path, RUN_DIR, package_name, original_file_path
+            )
 
         return file_names
 
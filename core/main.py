@@ -1,19 +1,36 @@
 import argparse
+import importlib
 import sys
 import os
 
-import core.bootstrap as bootstrap_task
-import core.compare as compare_task
-import core.show_dependencies as show_dependencies_task
-import core.open as open_task
-import core.find as find_task
-import core.retry_failed as retry_failed_task
-
 import utils.ui
 from utils.logging import logger
 
-from dbt.config import PROFILES_DIR
-from dbt.version import get_installed_version
+# Mirrors dbt.config.PROFILES_DIR without importing dbt at startup
+DEFAULT_PROFILES_DIR = os.path.join(os.path.expanduser("~"), ".dbt")
+PROFILES_DIR = os.path.expanduser(
+    os.environ.get("DBT_PROFILES_DIR", DEFAULT_PROFILES_DIR)
+)
+
+# Task classes are imported only when their sub-command runs, so that e.g.
+# `dbt-helper find` doesn't pay for importing dbt, jinja2 or agate.
+TASKS = {
+    "compare": "core.compare.CompareTask",
+    "bootstrap": "core.bootstrap.BootstrapTask",
+    "show-upstream": "core.show_dependencies.ShowDependenciesTask",
+    "show-downstream": "core.show_dependencies.ShowDependenciesTask",
+    "find": "core.find.FindTask",
+    "open": "core.open.OpenTask",
+    "retry-failed": "core.retry_failed.RetryFailedTask",
+    "timing": "core.timing.TimingTask",
+}
+
+# Resource types that show-upstream and show-downstream can filter on
+RESOURCE_TYPES = ("model", "source", "seed", "snapshot", "test", "analysis")
+
+# Sub-commands that only read files from the target directory and therefore
+# don't need a dbt install of a particular version
+FILE_ONLY_COMMANDS = ("find", "open", "timing")
 
 
 def get_nearest_project_dir():
@@ -31,6 +48,8 @@ def get_nearest_project_dir():
 
 def test_dbt_version():
     # Test if the dbt version is compatible with this version of dbt-helper
+    from dbt.version import get_installed_version
+
     installed_version = get_installed_version()
 
     VERSION_INCOMPATIBILITY_MSG = """
@@ -47,6 +66,15 @@ def test_dbt_version():
         sys.exit(1)
 
 
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            "expected a number of generations >= 0, got {}".format(value)
+        )
+    return number
+
+
 def parse_args(args):
 
     p = argparse.ArgumentParser(
@@ -93,14 +121,40 @@ def parse_args(args):
         parents=[base_subparser],
         help="Compare your dbt project specifications with what's in your database.",
     )
-    compare_sub.set_defaults(cls=compare_task.CompareTask, which="compare")
+    compare_sub.set_defaults(which="compare")
+    compare_sub.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="""
+        Number of schemas to inspect in parallel. Defaults to the number of
+        threads configured in your profile.""",
+    )
+    compare_sub.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=0,
+        dest="cache_ttl",
+        help="""
+        Reuse relation listings cached in target/dbt_helper that are younger
+        than this many seconds instead of querying the database. Defaults to
+        0 (always query).""",
+    )
+    compare_sub.add_argument(
+        "--bulk",
+        action="store_true",
+        help="""
+        List the relations of all schemas with one catalog query per database
+        instead of one query per schema. Falls back to the per-schema listing
+        on adapters that don't support it.""",
+    )
 
     bootstrap_sub = subs.add_parser(
         "bootstrap",
         parents=[base_subparser],
         help="Bootstrap schema.yml files from database catalog",
     )
-    bootstrap_sub.set_defaults(cls=bootstrap_task.BootstrapTask, which="bootsrap")
+    bootstrap_sub.set_defaults(which="bootsrap")
 
     bootstrap_sub.add_argument(
         "--schemas",
@@ -123,16 +177,59 @@ def parse_args(args):
         dest="write_files",
         help="Create schema.yml files (will not over-write existing files).",
     )
+    bootstrap_sub.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="""
+        Number of schemas to fetch catalog data for in parallel. Defaults to
+        the number of threads configured in your profile.""",
+    )
+    bootstrap_sub.add_argument(
+        "--skip-parse",
+        action="store_true",
+        dest="skip_parse",
+        help="""
+        Don't parse the dbt project; query the catalog with the adapter's
+        built-in macros. Much faster on large projects, but ignores any
+        get_catalog override in your project.""",
+    )
+    bootstrap_sub.add_argument(
+        "--incremental",
+        action="store_true",
+        help="""
+        Only emit relations that aren't documented in a .yml file yet, and
+        list the columns that were added or dropped for the ones that are.""",
+    )
+    bootstrap_sub.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=None,
+        dest="cache_ttl",
+        help="""
+        Reuse catalog snapshots in target/dbt_helper that are younger than
+        this many seconds instead of querying the database. Defaults to 3600
+        with --incremental and 0 (always query) otherwise.""",
+    )
+
+    for subparser in [compare_sub, bootstrap_sub]:
+        subparser.add_argument(
+            "--refresh",
+            nargs="*",
+            default=None,
+            metavar="SCHEMA",
+            help="""
+            Ignore (and drop) the cached catalog snapshots of the given
+            schemas, or of every schema if none are given, and query the
+            database instead.""",
+        )
 
     upstream_depencies_sub = subs.add_parser(
         "show-upstream",
         parents=[base_subparser],
         help="Show upstream dependencies for a model",
     )
-    upstream_depencies_sub.set_defaults(
-        cls=show_dependencies_task.ShowDependenciesTask, which="show-upstream"
-    )
-    upstream_depencies_sub.add_argument("model_name")
+    upstream_depencies_sub.set_defaults(which="show-upstream")
 
     downstream_depencies_sub = subs.add_parser(
         "show-downstream",
@@ -140,24 +237,104 @@ def parse_args(args):
         parents=[base_subparser],
         help="Show downstream dependencies for a model",
     )
-    downstream_depencies_sub.set_defaults(
-        cls=show_dependencies_task.ShowDependenciesTask, which="show-downstream"
-    )
-    downstream_depencies_sub.add_argument("model_name")
+    downstream_depencies_sub.set_defaults(which="show-downstream")
+
+    for subparser in [upstream_depencies_sub, downstream_depencies_sub]:
+        subparser.add_argument(
+            "selectors",
+            nargs="+",
+            metavar="SELECTOR",
+            help="""
+            One or more models to start from: a model name, tag:<tag> or
+            path:<path>. Prefix (show-upstream) or suffix (show-downstream)
+            a selector with N+ / +N to only follow N generations from it.""",
+        )
+        subparser.add_argument(
+            "--from-manifest",
+            action="store_true",
+            dest="from_manifest",
+            help="""
+            Build the dependency graph from target/manifest.json instead of
+            parsing the project. Falls back to a full parse if the file is
+            missing or out of date.""",
+        )
+        subparser.add_argument(
+            "--level-by",
+            choices=["longest", "shortest"],
+            default=None,
+            dest="level_by",
+            help="""
+            Place each model at its longest or shortest distance from the
+            given model. Defaults to longest, or to shortest when the number
+            of generations is limited, so that no model is placed further
+            away than the limit.""",
+        )
+        subparser.add_argument(
+            "--depth",
+            type=non_negative_int,
+            default=None,
+            help="""
+            Only follow dependencies this many generations from the selected
+            models.""",
+        )
+        subparser.add_argument(
+            "--resource-type",
+            action="append",
+            choices=RESOURCE_TYPES,
+            dest="resource_types",
+            metavar="TYPE",
+            help="""
+            Only show (and walk through) nodes of this resource type. Can be
+            given more than once. One of {}.""".format(", ".join(RESOURCE_TYPES)),
+        )
+        subparser.add_argument(
+            "--exclude-resource-type",
+            action="append",
+            choices=RESOURCE_TYPES,
+            dest="exclude_resource_types",
+            metavar="TYPE",
+            help="""
+            Don't show (or walk through) nodes of this resource type. Can be
+            given more than once.""",
+        )
+        subparser.add_argument(
+            "--materialized",
+            action="append",
+            dest="materializations",
+            metavar="MATERIALIZATION",
+            help="""
+            Only show (and walk through) nodes with this materialization, e.g.
+            table or view. Can be given more than once.""",
+        )
+        subparser.add_argument(
+            "--output",
+            choices=["json", "dot", "csv"],
+            default=None,
+            help="""
+            Write the nodes and edges of the dependency graph as JSON, a
+            Graphviz digraph or a CSV edge list instead of printing the
+            layers.""",
+        )
+        subparser.add_argument(
+            "--output-path",
+            default=None,
+            dest="output_path",
+            help="Write --output to this file instead of stdout.",
+        )
 
     find_sub = subs.add_parser(
         "find",
         parents=[base_subparser],
         help="Find the source/compiled/run file for a model",
     )
-    find_sub.set_defaults(cls=find_task.FindTask, which="find", code_type="compiled")
+    find_sub.set_defaults(which="find", code_type="compiled")
 
     open_sub = subs.add_parser(
         "open",
         parents=[base_subparser],
         help="Open the source/compiled/run file for a model",
     )
-    open_sub.set_defaults(cls=open_task.OpenTask, which="open", code_type="compiled")
+    open_sub.set_defaults(which="open", code_type="compiled")
 
     for subparser in [find_sub, open_sub]:
 
@@ -203,8 +380,48 @@ def parse_args(args):
         help="""Rerun the models that failed or were skipped on the previous run.""",
     )
 
-    retry_failed_sub.set_defaults(
-        cls=retry_failed_task.RetryFailedTask, which="retry-failed"
+    retry_failed_sub.set_defaults(which="retry-failed")
+    retry_failed_sub.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="""
+        Number of independent groups of failed models to retry concurrently,
+        each in its own dbt invocation. Defaults to 1. The invocations share
+        the target directory, so afterwards run_results.json only holds the
+        results of the last one to finish.""",
+    )
+
+    timing_sub = subs.add_parser(
+        "timing",
+        aliases=["slowest"],
+        parents=[base_subparser],
+        help="""
+        Record the results of the latest dbt run and show the slowest models,
+        timing regressions and the models that fail most often.""",
+    )
+    timing_sub.set_defaults(which="timing")
+    timing_sub.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        help="Number of models to list in each section. Defaults to 10.",
+    )
+    timing_sub.add_argument(
+        "--window",
+        type=int,
+        default=10,
+        help="""
+        Number of previous runs to compare against and to count failures
+        over. Defaults to 10.""",
+    )
+    timing_sub.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="""
+        Report a model as a regression when it took this many times longer
+        than its average. Defaults to 1.5.""",
     )
 
     if len(args) == 0:
@@ -216,7 +433,22 @@ def parse_args(args):
     return parsed
 
 
+def get_task_class(command):
+    module_name, class_name = TASKS[command].rsplit(".", 1)
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
 def handle(args):
+    results, _ = handle_and_check(args)
+    return results
+
+
+def handle_and_check(args):
+    """
+    Run the sub-command and return (results, exit_code). Tasks that can fail
+    after running to completion (e.g. retry-failed) report it in exit_code.
+    """
 
     nearest_project_dir = get_nearest_project_dir()
     if nearest_project_dir is None:
@@ -230,14 +462,6 @@ def handle(args):
     parsed = parse_args(args)
     results = None
 
-    if parsed.command == "bootstrap":
-        task = bootstrap_task.BootstrapTask(parsed)
-        results = task.run()
-
-    if parsed.command == "compare":
-        task = compare_task.CompareTask(parsed)
-        results = task.run()
-
     if parsed.command in ("show_upstream", "show_downstream"):
         logger.info(
             utils.ui.yellow(
@@ -252,29 +476,29 @@ def handle(args):
         else:
             parsed.command = "show-downstream"
 
-    if parsed.command in ("show-upstream", "show-downstream"):
-        task = show_dependencies_task.ShowDependenciesTask(parsed)
-        results = task.run(parsed)
+    if parsed.command == "slowest":
+        parsed.command = "timing"
 
-    if parsed.command == "find":
-        task = find_task.FindTask(parsed)
-        results = task.run()
+    if parsed.command is None:
+        return results, 0
 
-    if parsed.command == "open":
-        task = open_task.OpenTask(parsed)
-        results = task.run()
+    if parsed.command not in FILE_ONLY_COMMANDS:
+        test_dbt_version()
 
-    if parsed.command == "retry-failed":
-        task = retry_failed_task.RetryFailedTask(parsed)
+    task = get_task_class(parsed.command)(parsed)
+
+    if parsed.command in ("show-upstream", "show-downstream"):
+        results = task.run(parsed)
+    else:
         results = task.run()
 
-    return results
+    return results, getattr(task, "exit_code", 0)
 
 
 def main(args=None):
     if args is None:
         args = sys.argv[1:]
 
-    test_dbt_version()
-
-    handle(args)
+    _, exit_code = handle_and_check(args)
+    if exit_code:
+        sys.exit(exit_code)
@@ -1,10 +1,21 @@
 from dbt.config import RuntimeConfig
 
 import os
-import json
+import sqlite3
 import subprocess
 
-RUN_RESULTS_FILE = "run_results.json"
+import utils.graph
+import utils.lineage
+import utils.parallel
+import utils.retry_plan
+import utils.run_history
+import utils.run_results
+import utils.ui
+from utils.logging import logger
+
+# Keep each dbt command line well under the OS limit (32767 characters on
+# Windows; on Linux a few hundred KB once the environment is counted)
+MAX_COMMAND_LENGTH = 30000 if os.name == "nt" else 100000
 
 
 class RetryFailedTask:
@@ -12,27 +23,49 @@ class RetryFailedTask:
         self.args = args
         self.config = RuntimeConfig.from_args(args)
         self.target_path = self.config.target_path
-        self.run_results = self._get_run_results()
+        # non-zero if any model still fails after the retry
+        self.exit_code = 0
 
-    def _get_run_results(self):
+    def get_failed_nodes(self):
+        """
+        Return (errored, skipped, succeeded, names): the unique_ids of the
+        errored and skipped nodes, in run order, the set of unique_ids of the
+        nodes that ran without erroring, and {unique_id: name} for the errored
+        and skipped ones (None if run_results.json doesn't record names). The
+        results are streamed from run_results.json, decoding only the fields
+        used here.
         """
-        This subcommand parses the results.json file
+        errored = []
+        skipped = []
+        succeeded = set()
+        names = {}
+        for result in utils.run_results.iter_run_results(self.target_path):
+            unique_id = utils.run_results.get_result_unique_id(result)
+            status = utils.run_results.get_result_status(result)
+            if status == "error":
+                errored.append(unique_id)
+            elif status == "skipped":
+                skipped.append(unique_id)
+            else:
+                succeeded.add(unique_id)
+                continue
+            names[unique_id] = result.get("node", {}).get("name")
+        return errored, skipped, succeeded, names
+
+    def record_run_history(self):
+        """
+        Add run_results.json to the run history before the retry overwrites
+        it, so that `dbt-helper timing` sees the failed run too. Errors are
+        ignored, since the retry doesn't depend on the history.
         """
-        run_results_path = os.path.join(self.target_path, RUN_RESULTS_FILE)
         try:
-            with open(run_results_path) as f:
-                run_results = json.load(f)
-            return run_results
-        except IOError:
-            raise Exception("Could not find {} file.".format(RUN_RESULTS_FILE))
-
-    def get_models_to_retry(self):
-        """Return a list of errored and skipped models"""
-        models = []
-        for result in self.run_results.get("results"):
-            if result["status"] == "ERROR" or result["skip"]:
-                models.append(result["node"]["name"])
-        return models
+            conn = utils.run_history.connect(self.target_path)
+            try:
+                utils.run_history.ingest_run_results(conn, self.target_path)
+            finally:
+                conn.close()
+        except (OSError, sqlite3.DatabaseError):
+            pass
 
     def get_run_flags(self):
         """This is a janky function that takes the args and puts them back
@@ -46,21 +79,133 @@ class RetryFailedTask:
             flags.extend(["--target", self.args.target])
         return flags
 
+    def run_dbt(self, selectors, stop_on_error=False):
+        """
+        Run dbt for the given --models selectors and return the exit code of
+        the first failing invocation (or 0). dbt is called without a shell,
+        and the selectors are split across as many invocations as needed to
+        keep each command line under MAX_COMMAND_LENGTH. The batches run in
+        order, so batches of a run-ordered list respect dependencies.
+        """
+        run_flags = self.get_run_flags()
+        exit_code = 0
+        for batch in utils.retry_plan.chunk_args(selectors, MAX_COMMAND_LENGTH):
+            args = ["dbt", "run", "--models"]
+            args.extend(batch)
+            args.extend(run_flags)
+
+            print(" ".join(args))
+            batch_exit_code = subprocess.call(args)
+            if batch_exit_code != 0:
+                if stop_on_error:
+                    return batch_exit_code
+                exit_code = exit_code or batch_exit_code
+        return exit_code
+
+    def retry_cluster(self, cluster, selectors, names):
+        """
+        Retry the errored roots of a cluster, then the models that were
+        skipped because of them. The skipped models are only retried if
+        every root passes, since they would otherwise be built on top of a
+        relation that is still broken.
+        """
+        if cluster.roots:
+            exit_code = self.run_dbt([selectors[u] for u in cluster.roots])
+            if exit_code != 0:
+                if cluster.descendants:
+                    logger.info(
+                        utils.ui.yellow(
+                            "Warning: {} still failing. Not retrying the {} "
+                            "models downstream of it.".format(
+                                ", ".join(names[u] for u in cluster.roots),
+                                len(cluster.descendants),
+                            )
+                        )
+                    )
+                return exit_code
+
+        if cluster.descendants:
+            return self.run_dbt(
+                [selectors[u] for u in cluster.descendants], stop_on_error=True
+            )
+        return 0
+
+    def get_selectors(self, lineage, names):
+        """
+        Return {unique_id: selector}, selecting each node by its fully
+        qualified name so that models with the same name in different
+        packages or folders can't be confused
+        """
+        selectors = {}
+        for unique_id, name in names.items():
+            node = lineage.nodes.get(unique_id)
+            selectors[unique_id] = node["fqn"] if node else name
+        return selectors
+
     def run(self):
-        models_to_retry = self.get_models_to_retry()
+        self.record_run_history()
+        errored, skipped, succeeded, names = self.get_failed_nodes()
 
-        if models_to_retry == []:
+        if not errored and not skipped:
             raise Exception("No models to rerun!")
 
-        run_flags = self.get_run_flags()
+        lineage = utils.lineage.load_lineage(self.target_path)
+        for unique_id, name in names.items():
+            if name is None:
+                names[unique_id] = lineage.nodes[unique_id]["name"]
+        selectors = self.get_selectors(lineage, names)
+        graph = utils.graph.DependencyGraph(lineage.parent_map)
+
+        # only rebuild the errored nodes and what they kept from running
+        affected = utils.retry_plan.get_affected_nodes(
+            graph, errored, skipped, succeeded
+        )
+        if len(affected) < len(skipped):
+            logger.info(
+                "Not retrying {} skipped models that don't depend on a "
+                "failed model.".format(len(skipped) - len(affected))
+            )
+        plan = utils.retry_plan.plan_retry(graph, errored, affected, succeeded)
+
+        if self.args.workers > 1 and len(plan) > 1:
+            logger.info(
+                utils.ui.yellow(
+                    "Warning: The concurrent dbt invocations all write to {}, "
+                    "so its run_results.json and manifest.json will only hold "
+                    "the results of the last one to finish.".format(
+                        self.target_path
+                    )
+                )
+            )
 
-        args = ["dbt run --models"]
-        args.extend(models_to_retry)
-        args.extend(run_flags)
+        results = utils.parallel.map_threaded(
+            self.retry_cluster,
+            [(cluster, selectors, names) for cluster in plan],
+            self.args.workers,
+        )
 
-        command = " ".join(args)
+        failed = 0
+        for _, exit_code, e in results:
+            if e is not None:
+                logger.info(utils.ui.red("Error: {}".format(e)))
+                exit_code = 1
+            if exit_code != 0:
+                failed += 1
+                self.exit_code = self.exit_code or exit_code
 
-        print(command)
-        subprocess.call(command, shell=True)
+        if failed:
+            logger.info(
+                utils.ui.red(
+                    "{} of {} independent groups of models still failed.".format(
+                        failed, len(plan)
+                    )
+                )
+            )
+        else:
+            logger.info(utils.ui.green("All models were retried successfully."))
 
-        return models_to_retry
+        return [
+            names[unique_id]
+            for cluster in plan
+            for unique_id in cluster.roots + cluster.descendants
+        ]
@@ -1,6 +1,14 @@
-import networkx as nx
+import sys
+
+import dbt.adapters.factory
 import dbt.perf_utils
 from dbt.config import RuntimeConfig
+import utils.graph
+import utils.graph_writer
+import utils.lineage
+import utils.manifest
+import utils.selector
+import utils.logging
 import utils.ui
 from utils.logging import logger
 
@@ -14,125 +22,76 @@ class ShowDependenciesTask:
             self.direction = "downstream"
         else:
             raise
+        if self.args.output and self.args.output_path is None:
+            # keep warnings out of the JSON/DOT/CSV written to stdout
+            utils.logging.log_to_stderr()
         self.config = RuntimeConfig.from_args(args)
         self.model_path = self.config.source_paths[0]
 
+        self.lineage = self._get_lineage()
+
+    def _get_lineage(self):
+        """
+        With --from-manifest the lineage is read from target/manifest.json
+        (through the on-disk lineage cache), which skips the full project
+        parse. We only fall back to parsing if the file is missing or older
+        than the project files.
+        """
+        if self.args.from_manifest:
+            if not utils.manifest.manifest_is_stale(self.config):
+                return utils.lineage.load_lineage(self.config.target_path)
+            logger.info(
+                utils.ui.yellow(
+                    "Warning: {} is missing or out of date. "
+                    "Parsing the project instead.".format(utils.manifest.MANIFEST_FILE)
+                )
+            )
+
         dbt.adapters.factory.register_adapter(self.config)
         adapter = dbt.adapters.factory.get_adapter(self.config)
         self.adapter_type = adapter.type()
 
-        self.manifest = self._get_manifest()
-
-    def _get_manifest(self):
         manifest = dbt.perf_utils.get_full_manifest(self.config)
-        return manifest
-
-    # this traverses an arbitrary tree (parents or children) to get all ancestors or descendants
-    def traverse_tree(self, node, d_tree, been_done=set()):
-        tree_outputs = set(d_tree.get(node, set()))  # direct relatives
-        for key in d_tree.get(node, set()):  # 2nd step relatives
-            if key not in been_done:
-                been_done.add(key)  # to break any circular references
-                tree_outputs = tree_outputs.union(
-                    self.traverse_tree(key, d_tree, been_done)
-                )
-        return tree_outputs
-
-    # this reverses a parent tree to a child tree
-    def get_child_dict(self, parent_dict):
-        child_dict = {}
-        for node in parent_dict:
-            for parent in parent_dict[node]:
-                if parent not in child_dict.keys():
-                    child_dict[parent] = set([node])
-                else:
-                    child_dict[parent].add(node)
-        return child_dict
-
-    def get_node_set(self, parent_dict, focal_set):
-
-        downstream_dict = {}  # intended to store all descendants (any generation)
-        upstream_dict = {}  # intended to store all ancestry (any generation)
-        node_set = set()
-
-        # reverse parent dict to child so we can look for descendants
-        child_dict = self.get_child_dict(parent_dict)  # immediate children
-
-        # build descendant dict
-        for node in child_dict:
-            downstream_dict[node] = self.traverse_tree(
-                node, child_dict, been_done=set()
-            )
-
-        # build ancestor dict
-        for node in parent_dict:
-            upstream_dict[node] = self.traverse_tree(node, parent_dict, been_done=set())
-
-        for focal_node in focal_set:
-            if self.direction == "upstream":
-                node_set = upstream_dict.get(focal_node, set())
-            else:
-                node_set = downstream_dict.get(focal_node, set())
-            node_set.add(focal_node)
-
-        return node_set
+        return utils.lineage.build_parsed_lineage(manifest)
 
     def dereference_model_name(self, model_name):
-        for name, node in self.manifest.nodes.items():
-            if node.name == model_name:
-                return name
+        unique_ids = [
+            unique_id
+            for unique_id in self.lineage.index.lookup(model_name)
+            if self.lineage.nodes[unique_id]["resource_type"] != "source"
+        ]
+        if len(unique_ids) > 1:
+            logger.info(
+                utils.ui.yellow(
+                    "Warning: {}".format(
+                        self.lineage.index.ambiguous_name_message(
+                            model_name, unique_ids
+                        )
+                    )
+                )
+            )
+            return None
+        if unique_ids:
+            return unique_ids[0]
 
     def get_node_info(self):
 
         node_info_dict = {}  # intended to store direct node type
         parent_dict = {}  # intended to store parent data
 
-        for name, node in self.manifest.nodes.items():
-            d = {}
-            d["name"] = name
-            if node.resource_type != "test":
-                mat = node.config["materialized"]
-                if len(node.fqn) == 3:
-                    schema = node.fqn[1]
-                else:
-                    schema = node.fqn[0]
-
-                alias = node.alias
-                parents = node.depends_on.nodes
-
-                d["type"] = mat
-                d["alias"] = "{}.{}".format(schema, alias)
-
-            # add the object name and type and direct parents to the dict
-            node_info_dict[d["name"]] = d
-            parent_dict[d["name"]] = parents
-
-        for unique_id, source in self.manifest.sources.items():
+        for unique_id, node in self.lineage.nodes.items():
             d = {}
             d["name"] = unique_id
-            mat = "source"
-            schema = source.schema
-            alias = source.name
-            parents = []
-
-            d["type"] = mat
-            d["alias"] = "{}.{}".format(schema, alias)
+            d["type"] = node["materialized"]
+            d["alias"] = node["alias"]
+            d["resource_type"] = node["resource_type"]
 
             # add the object name and type and direct parents to the dict
-            node_info_dict[d["name"]] = d
-            parent_dict[d["name"]] = parents
+            node_info_dict[unique_id] = d
+            parent_dict[unique_id] = self.lineage.parent_map.get(unique_id, [])
 
         return (parent_dict, node_info_dict)
 
-    def build_d_graph(self, parent_dict, node_set, node_type_dict):
-        G = nx.DiGraph()  # initialize directional graph object
-
-        for node in node_set:
-            G.add_node(node)
-            for parent in parent_dict.get(node, set()):
-                G.add_edge(parent, node)
-        return G
-
     def display_deps(self, viz_dict):
         rev = self.direction == "downstream"
         keylist = list(viz_dict.keys())
@@ -142,60 +101,142 @@ class ShowDependenciesTask:
             print(" | ".join(viz_dict[layer]).center(80))
             print("-" * 80)
 
-    def subset_dict(self, d, nodes):
-        out_d = {}
-        for k, v in d.items():
-            if k in nodes:
-                dep_set = set()
-                for n in d[k]:
-                    if n in nodes:
-                        dep_set.add(n)
-                out_d[k] = dep_set
-        return out_d
+    def iter_output_nodes(self, levels):
+        for unique_id, level in levels.items():
+            node_info = self.node_info_dict[unique_id]
+            yield {
+                "unique_id": unique_id,
+                "alias": node_info["alias"],
+                "resource_type": node_info["resource_type"],
+                "materialized": node_info["type"],
+                "level": level,
+            }
+
+    def iter_output_edges(self, G, levels):
+        for unique_id in levels:
+            for parent in G.predecessors(unique_id):
+                if parent in levels:
+                    yield parent, unique_id
+
+    def write_output(self, G, levels):
+        """
+        Stream the nodes and edges of the traversed subgraph to --output-path
+        (or stdout) in the --output format
+        """
+        writer = utils.graph_writer.WRITERS[self.args.output]
+        nodes = self.iter_output_nodes(levels)
+        edges = self.iter_output_edges(G, levels)
+        if self.args.output_path is None:
+            writer(sys.stdout, nodes, edges)
+            return
+        with open(self.args.output_path, "w", newline="") as f:
+            writer(f, nodes, edges)
 
     def pretty_node_name(self, name):
         return self.node_info_dict[name]["alias"]
 
+    def select_nodes(self, selector):
+        if selector.method == "tag":
+            return self.lineage.index.lookup_tag(selector.value)
+        if selector.method == "path":
+            return utils.selector.select_by_path(self.lineage.nodes, selector.value)
+        unique_id = self.dereference_model_name(selector.value)
+        return [unique_id] if unique_id else []
+
+    def get_focal_nodes(self):
+        """
+        Resolve the selectors on the command line to {unique_id: depth}, the
+        starting points of the traversal and the number of generations to
+        follow from each.
+        """
+        focal_nodes = {}
+        for selector_arg in self.args.selectors:
+            selector = utils.selector.parse_selector(selector_arg)
+            if self.direction == "upstream":
+                depth, other_side = selector.parents, selector.children
+            else:
+                depth, other_side = selector.children, selector.parents
+            if other_side is not None:
+                raise Exception(
+                    "The selector '{}' can't be used with show-{}: put the '+' "
+                    "on the {} side of the model.".format(
+                        selector_arg,
+                        self.direction,
+                        "left" if self.direction == "upstream" else "right",
+                    )
+                )
+            if depth is None:
+                depth = utils.selector.UNLIMITED
+            if self.args.depth is not None:
+                depth = min(depth, self.args.depth)
+
+            unique_ids = self.select_nodes(selector)
+            if not unique_ids:
+                logger.info(
+                    utils.ui.yellow(
+                        "Warning: The model argument {} does not match any models "
+                        "found in this project:".format(selector_arg)
+                    )
+                )
+            for unique_id in unique_ids:
+                focal_nodes[unique_id] = max(depth, focal_nodes.get(unique_id, 0))
+        return focal_nodes
+
+    def get_node_filter(self):
+        """
+        Return a predicate for the --resource-type, --exclude-resource-type
+        and --materialized options, or None if none of them were given.
+        """
+        resource_types = self.args.resource_types
+        exclude_resource_types = self.args.exclude_resource_types
+        materializations = self.args.materializations
+        if not (resource_types or exclude_resource_types or materializations):
+            return None
+
+        def include(unique_id):
+            node = self.lineage.nodes[unique_id]
+            resource_type = node["resource_type"]
+            if resource_types and resource_type not in resource_types:
+                return False
+            if exclude_resource_types and resource_type in exclude_resource_types:
+                return False
+            if materializations and node["materialized"] not in materializations:
+                return False
+            return True
+
+        return include
+
     def run(self, args):
         parent_dict, self.node_info_dict = self.get_node_info()
-        dbt_name = self.dereference_model_name(self.args.model_name)
-        if not dbt_name:
-            logger.info(
-                utils.ui.yellow(
-                    "Warning: The model argument {} does not match any models "
-                    "found in this project:".format(self.args.model_name)
-                )
-            )
+        focal_nodes = self.get_focal_nodes()
+        if not focal_nodes:
             return {}
-        focal_set = set([dbt_name])
 
-        node_set = self.get_node_set(parent_dict, focal_set)
-
-        parent_subset_dict = self.subset_dict(parent_dict, node_set)
-
-        G = self.build_d_graph(parent_subset_dict, node_set, self.node_info_dict)
+        # every selector is resolved up front, so the union of their closures
+        # is computed in a single traversal of the graph
+        G = utils.graph.DependencyGraph(parent_dict)
+        depths = {
+            unique_id: depth
+            for unique_id, depth in focal_nodes.items()
+            if depth != utils.selector.UNLIMITED
+        }
+        # the depth limit counts generations along the shortest path, so the
+        # longest path to a node within it can be longer than the limit
+        level_by = self.args.level_by or ("shortest" if depths else "longest")
+        levels = G.levels(
+            focal_nodes,
+            self.direction,
+            longest=level_by == "longest",
+            depths=depths,
+            include=self.get_node_filter(),
+        )
 
         viz_dict = {}
+        for node, level in levels.items():
+            viz_dict.setdefault(level, []).append(self.pretty_node_name(node))
 
-        def update_viz_dict(G, current_node, level=0):
-            if len(G.nodes()) == 0:
-                viz_dict[0] = [self.pretty_node_name(dbt_name)]
-                return
-            if level in viz_dict:
-                viz_dict[level].append(self.pretty_node_name(current_node))
-            else:
-                viz_dict[level] = [self.pretty_node_name(current_node)]
-            if self.direction == "upstream":
-                if G.predecessors(current_node) == []:
-                    return
-                for pred in G.predecessors(current_node):
-                    update_viz_dict(G, pred, level + 1)
-            if self.direction == "downstream":
-                if G.successors(current_node) == []:
-                    return
-                for pred in G.successors(current_node):
-                    update_viz_dict(G, pred, level + 1)
-
-        update_viz_dict(G, dbt_name)
-        self.display_deps(viz_dict)
+        if self.args.output:
+            self.write_output(G, levels)
+        else:
+            self.display_deps(viz_dict)
         return viz_dict
@@ -0,0 +1,90 @@
+import os
+
+import utils.run_history
+import utils.run_results
+import utils.ui
+from utils.logging import logger
+from utils.manifest import get_target_path
+
+
+class TimingTask:
+    def __init__(self, args):
+        self.args = args
+        self.target_path = get_target_path(args)
+
+    def ingest(self, conn):
+        """Add the latest run_results.json to the history if it's new"""
+        if not os.path.isfile(
+            utils.run_results.get_run_results_path(self.target_path)
+        ):
+            logger.info(
+                utils.ui.yellow(
+                    "Warning: Could not find {} file. Showing the runs recorded "
+                    "so far.".format(utils.run_results.RUN_RESULTS_FILE)
+                )
+            )
+            return
+        if utils.run_history.ingest_run_results(conn, self.target_path):
+            logger.info("Recorded the results of the latest run.")
+
+    def print_slowest(self, rows):
+        logger.info("\nSlowest successful models in the latest run:")
+        for name, execution_time, thread_id, average in rows:
+            logger.info(
+                "  {:<40} {:>9.2f}s  {:<12} {}".format(
+                    name,
+                    execution_time,
+                    thread_id or "",
+                    "avg {:.2f}s".format(average) if average is not None else "",
+                )
+            )
+
+    def print_regressions(self, rows):
+        logger.info(
+            "\nModels at least {}x slower than their average over the "
+            "previous {} runs:".format(self.args.threshold, self.args.window)
+        )
+        if not rows:
+            logger.info(utils.ui.green("  None"))
+        for name, execution_time, average in rows:
+            logger.info(
+                utils.ui.yellow(
+                    "  {:<40} {:>9.2f}s  avg {:.2f}s ({:+.0%})".format(
+                        name, execution_time, average, execution_time / average - 1
+                    )
+                )
+            )
+
+    def print_failures(self, rows):
+        logger.info(
+            "\nModels that failed most often over the last {} runs:".format(
+                self.args.window
+            )
+        )
+        if not rows:
+            logger.info(utils.ui.green("  None"))
+        for name, failures, runs in rows:
+            logger.info(
+                utils.ui.red("  {:<40} {} of {} runs".format(name, failures, runs))
+            )
+
+    def run(self):
+        conn = utils.run_history.connect(self.target_path)
+        try:
+            self.ingest(conn)
+            results = {
+                "slowest": utils.run_history.get_slowest(conn, self.args.limit),
+                "regressions": utils.run_history.get_regressions(
+                    conn, self.args.window, self.args.threshold, self.args.limit
+                ),
+                "failures": utils.run_history.get_failure_counts(
+                    conn, self.args.window, self.args.limit
+                ),
+            }
+        finally:
+            conn.close()
+
+        self.print_slowest(results["slowest"])
+        self.print_regressions(results["regressions"])
+        self.print_failures(results["failures"])
+        return results
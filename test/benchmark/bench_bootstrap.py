@@ -0,0 +1,50 @@
+"""
+Time `dbt-helper bootstrap` with and without --skip-parse. Unlike the other
+benchmarks this one needs a dbt project and a working profile: run it from
+the project directory.
+
+    python -m test.benchmark.bench_bootstrap SCHEMA [SCHEMA ...]
+
+Each mode runs in a fresh interpreter, so neither starts with dbt already
+imported or the adapter already registered by the other.
+"""
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+HANDLE_ARGS = "import sys, core.main; core.main.handle(sys.argv[1:])"
+
+
+def measure(label, args):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (REPO_ROOT, env.get("PYTHONPATH")) if path
+    )
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", HANDLE_ARGS] + args,
+        stdout=subprocess.DEVNULL,
+        env=env,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    return label, elapsed
+
+
+def main(schemas):
+    args = ["bootstrap", "--schemas"] + schemas
+    timings = [
+        measure("full parse", list(args)),
+        measure("--skip-parse", args + ["--skip-parse"]),
+    ]
+    for label, elapsed in timings:
+        print("{:<14} {:>8.2f}s".format(label, elapsed))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
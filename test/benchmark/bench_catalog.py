@@ -0,0 +1,84 @@
+"""
+Compare grouping a catalog table into {schema: {table: [columns]}} with a
+single columnar pass against building a dict per row first (the approach
+bootstrap used before).
+
+Run from the repository root:
+
+    python -m test.benchmark.bench_catalog [number of columns]
+"""
+import sys
+import time
+
+from utils.catalog import group_catalog_columns
+
+COLUMN_NAMES = (
+    "table_database",
+    "table_schema",
+    "table_name",
+    "table_type",
+    "table_comment",
+    "table_owner",
+    "column_name",
+    "column_index",
+    "column_type",
+    "column_comment",
+)
+COLUMNS_PER_TABLE = 50
+TABLES_PER_SCHEMA = 200
+
+
+def make_rows(num_columns):
+    rows = []
+    for i in range(num_columns):
+        table = i // COLUMNS_PER_TABLE
+        rows.append(
+            (
+                "analytics",
+                "schema_{}".format(table // TABLES_PER_SCHEMA),
+                "table_{}".format(table),
+                "BASE TABLE",
+                None,
+                "dbt",
+                "column_{}".format(i % COLUMNS_PER_TABLE),
+                i % COLUMNS_PER_TABLE + 1,
+                "integer",
+                None,
+            )
+        )
+    return rows
+
+
+def group_row_dicts(column_names, rows):
+    grouped = {}
+    for row in [dict(zip(column_names, row)) for row in rows]:
+        columns = grouped.setdefault(row["table_schema"], {}).setdefault(
+            row["table_name"], {}
+        )
+        columns[row["column_name"]] = {"index": row["column_index"]}
+    return {
+        schema: {
+            table: sorted(columns, key=lambda c: columns[c]["index"])
+            for table, columns in sorted(tables.items())
+        }
+        for schema, tables in sorted(grouped.items())
+    }
+
+
+def measure(label, func, rows):
+    start = time.perf_counter()
+    result = func(COLUMN_NAMES, rows)
+    print("{:<12} {:>8.2f}s".format(label, time.perf_counter() - start))
+    return result
+
+
+def main(num_columns):
+    rows = make_rows(num_columns)
+    print("catalog: {} columns".format(len(rows)))
+    expected = measure("row dicts", group_row_dicts, rows)
+    grouped = measure("columnar", group_catalog_columns, rows)
+    assert expected == grouped
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
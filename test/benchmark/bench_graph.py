@@ -0,0 +1,112 @@
+"""
+Compare building and walking the dependency graph used by show-upstream and
+show-downstream with a networkx DiGraph (which show_dependencies used before)
+on a synthetic DAG. The networkx half is skipped if it isn't installed.
+
+Run from the repository root:
+
+    python -m test.benchmark.bench_graph [number of nodes]
+"""
+import random
+import sys
+import time
+import tracemalloc
+
+from utils.graph import DependencyGraph
+
+PARENTS_PER_NODE = 3
+WINDOW = 500
+
+
+def make_parent_map(num_nodes, seed=0):
+    """A layered DAG where each node depends on a few recent nodes"""
+    rng = random.Random(seed)
+    parent_map = {}
+    for i in range(num_nodes):
+        low = max(0, i - WINDOW)
+        parents = rng.sample(range(low, i), min(i - low, PARENTS_PER_NODE))
+        parent_map["model.bench.node_{}".format(i)] = [
+            "model.bench.node_{}".format(p) for p in parents
+        ]
+    return parent_map
+
+
+def build_native(parent_map):
+    return DependencyGraph(parent_map)
+
+
+def walk_native(graph, start, direction):
+    return graph.walk([start], direction)
+
+
+def build_networkx(parent_map):
+    import networkx as nx
+
+    graph = nx.DiGraph()
+    for child, parents in parent_map.items():
+        graph.add_node(child)
+        for parent in parents:
+            graph.add_edge(parent, child)
+    return graph
+
+
+def walk_networkx(graph, start, direction):
+    import networkx as nx
+
+    if direction == "upstream":
+        return nx.ancestors(graph, start) | {start}
+    return nx.descendants(graph, start) | {start}
+
+
+def measure(build, walk, parent_map):
+    start = time.perf_counter()
+    graph = build(parent_map)
+    build_time = time.perf_counter() - start
+
+    nodes = list(parent_map)
+    start = time.perf_counter()
+    upstream = walk(graph, nodes[-1], "upstream")
+    downstream = walk(graph, nodes[0], "downstream")
+    walk_time = time.perf_counter() - start
+
+    # memory is measured in a separate pass since tracemalloc slows things down
+    del graph
+    tracemalloc.start()
+    build(parent_map)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return build_time, walk_time, peak, len(upstream), len(downstream)
+
+
+def main(num_nodes):
+    parent_map = make_parent_map(num_nodes)
+    num_edges = sum(len(parents) for parents in parent_map.values())
+    print("{} nodes, {} edges".format(num_nodes, num_edges))
+
+    implementations = [("native", build_native, walk_native)]
+    try:
+        import networkx  # noqa: F401
+
+        implementations.append(("networkx", build_networkx, walk_networkx))
+    except ImportError:
+        print("networkx is not installed; only timing the native graph")
+
+    print(
+        "{:<10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "", "build", "walk", "memory", "upstream", "downstream"
+        )
+    )
+    for name, build, walk in implementations:
+        build_time, walk_time, peak, upstream, downstream = measure(
+            build, walk, parent_map
+        )
+        print(
+            "{:<10} {:>9.3f}s {:>9.3f}s {:>8.1f}MB {:>10} {:>10}".format(
+                name, build_time, walk_time, peak / 1e6, upstream, downstream
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
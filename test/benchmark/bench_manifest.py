@@ -0,0 +1,110 @@
+"""
+Compare reading manifest.json with json.load against the streaming reader
+used by find/open/show-* --from-manifest.
+
+Run from the repository root:
+
+    python -m test.benchmark.bench_manifest [number of models]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from utils.lineage import make_lineage, make_node_record, read_lineage
+from utils.manifest import MANIFEST_FILE
+
+SQL_PADDING = "select 1 as id -- padding\n" * 200
+
+
+def make_node(index):
+    name = "model_{}".format(index)
+    parents = ["model.bench.model_{}".format(index - 1)] if index else []
+    return {
+        "unique_id": "model.bench.{}".format(name),
+        "name": name,
+        "resource_type": "model",
+        "package_name": "bench",
+        "root_path": "/bench",
+        "original_file_path": "models/{}.sql".format(name),
+        "path": "{}.sql".format(name),
+        "config": {"materialized": "view", "tags": [], "post-hook": []},
+        "fqn": ["bench", name],
+        "alias": name,
+        "schema": "analytics",
+        "depends_on": {"nodes": parents, "macros": []},
+        "raw_sql": SQL_PADDING,
+        "compiled_sql": SQL_PADDING,
+        "description": "",
+        "columns": {},
+    }
+
+
+def write_manifest(target_path, num_models):
+    manifest = {
+        "nodes": {},
+        "sources": {},
+        "macros": {
+            "macro.bench.m_{}".format(i): {"macro_sql": SQL_PADDING}
+            for i in range(num_models)
+        },
+        "docs": {},
+    }
+    for index in range(num_models):
+        node = make_node(index)
+        manifest["nodes"][node["unique_id"]] = node
+    with open(os.path.join(target_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f)
+
+
+def load_with_json(target_path):
+    """Build the lineage from the whole manifest, decoded with json.load"""
+    with open(os.path.join(target_path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    nodes = {}
+    parent_map = {}
+    for unique_id, node in manifest["nodes"].items():
+        nodes[unique_id] = make_node_record(node)
+        parent_map[unique_id] = list(node["depends_on"]["nodes"])
+    for unique_id, source in manifest["sources"].items():
+        nodes[unique_id] = make_node_record(source)
+        parent_map[unique_id] = []
+    return make_lineage(nodes, parent_map)
+
+
+def measure(label, func, target_path):
+    # time and memory are measured in separate passes because tracemalloc
+    # slows down allocation-heavy code considerably
+    start = time.perf_counter()
+    lineage = func(target_path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(target_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        "{:<12} {:>8.2f}s {:>10.1f} MB peak  ({} nodes)".format(
+            label, elapsed, peak / 1024 / 1024, len(lineage.nodes)
+        )
+    )
+    return lineage
+
+
+def main(num_models):
+    with tempfile.TemporaryDirectory() as target_path:
+        write_manifest(target_path, num_models)
+        size = os.path.getsize(os.path.join(target_path, MANIFEST_FILE))
+        print("manifest.json: {:.1f} MB".format(size / 1024 / 1024))
+        expected = measure("json.load", load_with_json, target_path)
+        streamed = measure("streaming", read_lineage, target_path)
+        assert expected.nodes == streamed.nodes
+        assert expected.parent_map == streamed.parent_map
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
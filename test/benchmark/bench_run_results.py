@@ -0,0 +1,109 @@
+"""
+Compare reading run_results.json with json.load (as retry-failed used to)
+against the streaming reader in utils.run_results.
+
+Run from the repository root:
+
+    python -m test.benchmark.bench_run_results [number of results]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from utils.run_results import RUN_RESULTS_FILE, iter_run_results
+
+SQL_PADDING = "select 1 as id -- padding\n" * 200
+
+
+def make_result(index):
+    name = "model_{}".format(index)
+    return {
+        "node": {
+            "unique_id": "model.bench.{}".format(name),
+            "name": name,
+            "resource_type": "model",
+            "raw_sql": SQL_PADDING,
+            "compiled_sql": SQL_PADDING,
+            "injected_sql": SQL_PADDING,
+            "depends_on": {"nodes": [], "macros": []},
+            "config": {"materialized": "view"},
+        },
+        "error": "Database Error" if index % 10 == 0 else None,
+        "status": "ERROR" if index % 10 == 0 else "CREATE VIEW",
+        "skip": index % 10 == 1,
+        "fail": None,
+        "warn": None,
+        "execution_time": 0.5,
+        "thread_id": "Thread-{}".format(index % 8),
+        "timing": [
+            {
+                "name": "compile",
+                "started_at": "2020-01-01T00:00:00Z",
+                "completed_at": "2020-01-01T00:00:01Z",
+            }
+        ],
+    }
+
+
+def write_run_results(target_path, num_results):
+    run_results = {
+        "results": [make_result(index) for index in range(num_results)],
+        "generated_at": "2020-01-01T00:00:00Z",
+        "elapsed_time": 100.0,
+    }
+    with open(os.path.join(target_path, RUN_RESULTS_FILE), "w") as f:
+        json.dump(run_results, f)
+
+
+def get_failed(results):
+    return [
+        result["node"]["name"]
+        for result in results
+        if result["status"] == "ERROR" or result["skip"]
+    ]
+
+
+def load_with_json(target_path):
+    with open(os.path.join(target_path, RUN_RESULTS_FILE)) as f:
+        return get_failed(json.load(f)["results"])
+
+
+def load_streaming(target_path):
+    return get_failed(iter_run_results(target_path))
+
+
+def measure(label, func, target_path):
+    # time and memory are measured in separate passes because tracemalloc
+    # slows down allocation-heavy code considerably
+    start = time.perf_counter()
+    failed = func(target_path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(target_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        "{:<12} {:>8.2f}s {:>10.1f} MB peak  ({} failed)".format(
+            label, elapsed, peak / 1024 / 1024, len(failed)
+        )
+    )
+    return failed
+
+
+def main(num_results):
+    with tempfile.TemporaryDirectory() as target_path:
+        write_run_results(target_path, num_results)
+        size = os.path.getsize(os.path.join(target_path, RUN_RESULTS_FILE))
+        print("run_results.json: {:.1f} MB".format(size / 1024 / 1024))
+        expected = measure("json.load", load_with_json, target_path)
+        streamed = measure("streaming", load_streaming, target_path)
+        assert expected == streamed
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,69 @@
+"""
+Measure the cold-start import cost of each dbt-helper sub-command using
+`python -X importtime` (Python 3.7+). Commands other than find/open need dbt
+installed.
+
+Run from the repository root:
+
+    python -m test.benchmark.bench_startup [command ...]
+"""
+import subprocess
+import sys
+
+from core.main import TASKS
+
+IMPORT_TASK = "import core.main; core.main.get_task_class({!r})"
+
+LIST_MODULES = "import sys; print('\\n'.join(sorted(sys.modules)))"
+
+
+def get_imported_modules(command):
+    """Return the names of the modules imported to start a command"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_TASK.format(command) + "; " + LIST_MODULES],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout
+    return set(output.split())
+
+
+def get_import_times(command):
+    """Return {module: cumulative import time in microseconds} for a command"""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_TASK.format(command)],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+    import_times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        prefix_length = len("import time:")
+        _, cumulative, module = line[prefix_length:].split("|")
+        import_times[module.strip()] = int(cumulative)
+    if not import_times:
+        # Python 3.6 accepts -X importtime but doesn't report anything
+        raise Exception("-X importtime requires Python 3.7 or later")
+    return import_times
+
+
+def get_startup_time(command):
+    """Return the total import time of a command in seconds"""
+    import_times = get_import_times(command)
+    return sum(
+        cumulative
+        for module, cumulative in import_times.items()
+        if "." not in module
+    ) / 1e6
+
+
+def main(commands):
+    for command in commands or sorted(TASKS):
+        print("{:<16} {:>8.3f}s".format(command, get_startup_time(command)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
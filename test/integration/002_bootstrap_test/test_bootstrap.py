@@ -42,5 +42,37 @@ class TestBootstrap(DBTIntegrationTest):
             os.path.isfile(self.model_file_path(self.test_schema_name, "test_view.yml"))
         )
 
+    def test_bootstrap_write_skip_parse(self):
+        self.run_dbt(["run"])
+        self.run_dbthelper(
+            [
+                "bootstrap",
+                "--schemas",
+                self.test_schema_name,
+                "--write-files",
+                "--skip-parse",
+            ]
+        )
+
+        self.assertTrue(
+            os.path.isfile(
+                self.model_file_path(self.test_schema_name, "downstream.yml")
+            )
+        )
+        self.assertTrue(
+            os.path.isfile(self.model_file_path(self.test_schema_name, "test_view.yml"))
+        )
+
+    def test_bootstrap_incremental(self):
+        self.run_dbt(["run"])
+        self.run_dbthelper(
+            ["bootstrap", "--schemas", self.test_schema_name, "--write-files"]
+        )
+
+        results = self.run_dbthelper(
+            ["bootstrap", "--schemas", self.test_schema_name, "--incremental"]
+        )
+        self.assertEqual(results, [])
+
     def test_late_binding_view(self):
         pass
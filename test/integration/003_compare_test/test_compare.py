@@ -57,6 +57,8 @@ class CompareTest(DBTIntegrationTest):
         # Assert dbt compare fails
         results = self.run_dbthelper(["compare"])
         self.assertTrue(len(results) == 1)
+        results = self.run_dbthelper(["compare", "--bulk"])
+        self.assertTrue(len(results) == 1)
 
     def test__postgres__compare(self):
         self.compare_switch_to_ephemeral()
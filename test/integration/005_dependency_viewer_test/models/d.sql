@@ -1 +1,3 @@
+{{ config(tags=['finance']) }}
+
 SELECT * FROM {{ref('c')}}
@@ -0,0 +1,3 @@
+SELECT * FROM {{ref('a')}}
+UNION ALL
+SELECT * FROM {{ref('c')}}
@@ -1,3 +1,8 @@
+import csv
+import json
+import os
+import tempfile
+
 from test.integration.base import DBTIntegrationTest
 
 
@@ -13,6 +18,87 @@ class DependencyTest(DBTIntegrationTest):
         results = self.run_dbthelper(["show-downstream", "c"])
         self.assertTrue(len(results) == 2)
 
+    def test_dependencies_from_manifest(self):
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["show-upstream", "d", "--from-manifest"])
+        self.assertTrue(len(results) == 4)
+        results = self.run_dbthelper(["show-downstream", "c", "--from-manifest"])
+        self.assertTrue(len(results) == 2)
+
+    def test_dependencies_diamond(self):
+        # e refs both a and c, so a is one and three hops upstream of it
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["show-upstream", "e"])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(sum(len(layer) for layer in results.values()), 4)
+        results = self.run_dbthelper(["show-upstream", "e", "--level-by", "shortest"])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sum(len(layer) for layer in results.values()), 4)
+
+    def test_dependencies_selectors(self):
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["show-upstream", "d", "e"])
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(results[0]), 2)
+        results = self.run_dbthelper(["show-upstream", "1+e"])
+        self.assertEqual(len(results), 2)
+        results = self.run_dbthelper(["show-upstream", "tag:finance"])
+        self.assertEqual(len(results), 4)
+        results = self.run_dbthelper(["show-downstream", "path:models/c.sql"])
+        self.assertEqual(len(results), 2)
+        results = self.run_dbthelper(["show-downstream", "a+1"])
+        self.assertEqual(len(results), 2)
+
+    def test_dependencies_filtered(self):
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["show-downstream", "a", "--depth", "1"])
+        self.assertEqual(len(results), 2)
+        results = self.run_dbthelper(
+            ["show-upstream", "d", "--resource-type", "model", "--depth", "2"]
+        )
+        self.assertEqual(len(results), 3)
+        # e is three hops from a through c but only one directly, so with a depth
+        # limit it is placed by its shortest path and no layer exceeds the limit
+        results = self.run_dbthelper(["show-downstream", "a", "--depth", "2"])
+        self.assertEqual(sorted(results), [0, 1, 2])
+        with self.assertRaises(SystemExit):
+            self.run_dbthelper(["show-downstream", "a", "--depth", "-1"])
+        results = self.run_dbthelper(
+            ["show-upstream", "d", "--exclude-resource-type", "model"]
+        )
+        self.assertEqual(len(results), 1)
+        results = self.run_dbthelper(["show-downstream", "a", "--materialized", "table"])
+        self.assertEqual(len(results), 1)
+
+    def test_dependencies_output(self):
+        self.run_dbt(["run"])
+        output_dir = tempfile.mkdtemp()
+        output_path = os.path.join(output_dir, "lineage.json")
+        self.run_dbthelper(
+            ["show-upstream", "e", "--output", "json", "--output-path", output_path]
+        )
+        with open(output_path) as f:
+            lineage = json.load(f)
+        self.assertEqual(len(lineage["nodes"]), 4)
+        self.assertEqual(len(lineage["edges"]), 4)
+        self.assertEqual(
+            set(node["resource_type"] for node in lineage["nodes"]), {"model"}
+        )
+
+    def test_dependencies_output_csv(self):
+        # d has no children, so its only row is the node itself
+        self.run_dbt(["run"])
+        output_dir = tempfile.mkdtemp()
+        output_path = os.path.join(output_dir, "lineage.csv")
+        self.run_dbthelper(
+            ["show-downstream", "d", "--output", "csv", "--output-path", output_path]
+        )
+        with open(output_path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["kind"], "node")
+        self.assertEqual(rows[0]["alias"], "d")
+
     def test_bad_model_arg(self):
         self.run_dbt(["run"])
         results = self.run_dbthelper(["show-downstream", "non_existent_model"])
@@ -17,3 +17,20 @@ class SourceSchemaTest(DBTIntegrationTest):
         self.run_dbt(["run"])
         results = self.run_dbthelper(["compare"])
         self.assertTrue(len(results) == 0)
+
+    def test_compare_threads(self):
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["compare", "--threads", "2"])
+        self.assertTrue(len(results) == 0)
+
+    def test_compare_bulk(self):
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["compare", "--bulk"])
+        self.assertTrue(len(results) == 0)
+
+    def test_compare_cached(self):
+        self.run_dbt(["run"])
+        results = self.run_dbthelper(["compare", "--refresh"])
+        self.assertTrue(len(results) == 0)
+        results = self.run_dbthelper(["compare", "--cache-ttl", "600"])
+        self.assertTrue(len(results) == 0)
@@ -127,3 +127,11 @@ class OpenFindTest(DBTIntegrationTest):
         self.assertTrue(self.check_model_file_path("find", ["my_model", "--source"]))
         self.assertTrue(self.check_model_file_path("find", ["my_package_model", "-s"]))
         self.assertTrue(self.check_model_file_path("find", ["incremental", "-s"]))
+
+    def test_find_package_qualified_name(self):
+        self.run_dbt(["deps"])
+        # This will cause errors that we can ignore from the integration package
+        self.run_dbt(["run"])
+
+        result = self.run_dbthelper(["find", "local_dep.my_package_model"])
+        self.assertTrue(result.endswith("local_dep/models/my_package_model.sql"))
@@ -15,3 +15,21 @@ class RetryFailedTest(DBTIntegrationTest):
             self.run_dbthelper(["retry-failed"]),
             ["my_failing_model", "my_skipped_model"],
         )
+
+    def tests_retry_failed_exit_code(self):
+        _, success = self.run_dbt(["run"])
+
+        self.assertFalse(success)
+
+        # my_failing_model is still invalid SQL
+        _, exit_code = self.run_dbthelper_and_check(["retry-failed"])
+        self.assertNotEqual(exit_code, 0)
+
+    def tests_timing(self):
+        _, success = self.run_dbt(["run"])
+
+        self.assertFalse(success)
+
+        results = self.run_dbthelper(["timing"])
+        self.assertIn("my_passing_model", [row[0] for row in results["slowest"]])
+        self.assertIn("my_failing_model", [row[0] for row in results["failures"]])
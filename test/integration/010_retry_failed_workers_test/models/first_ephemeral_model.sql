@@ -0,0 +1,3 @@
+{{ config(materialized='ephemeral') }}
+
+select * from {{ ref('first_failing_model') }}
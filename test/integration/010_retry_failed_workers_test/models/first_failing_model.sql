@@ -0,0 +1 @@
+This is invalid SQL
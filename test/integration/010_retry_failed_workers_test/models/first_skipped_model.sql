@@ -0,0 +1 @@
+select * from {{ ref('first_ephemeral_model') }}
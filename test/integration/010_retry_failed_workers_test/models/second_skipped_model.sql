@@ -0,0 +1,2 @@
+-- depends on {{ ref('second_failing_model') }}
+select 1 as colname
@@ -0,0 +1,29 @@
+from test.integration.base import DBTIntegrationTest
+
+
+class RetryFailedWorkersTest(DBTIntegrationTest):
+    @property
+    def models(self):
+        return "test/integration/010_retry_failed_workers_test/models"
+
+    def tests_retry_failed_workers(self):
+        # two independent failures, so the two groups are retried concurrently.
+        # first_skipped_model is only linked to its failure through an
+        # ephemeral model, which has no run result.
+        _, success = self.run_dbt(["run"])
+
+        self.assertFalse(success)
+
+        results, exit_code = self.run_dbthelper_and_check(
+            ["retry-failed", "--workers", "2"]
+        )
+        self.assertEqual(
+            sorted(results),
+            [
+                "first_failing_model",
+                "first_skipped_model",
+                "second_failing_model",
+                "second_skipped_model",
+            ],
+        )
+        self.assertNotEqual(exit_code, 0)
@@ -6,6 +6,7 @@ from dbt.logger import log_manager
 import sys
 import os
 import yaml
+import core.main
 from core.main import handle
 import shutil
 
@@ -207,6 +208,11 @@ class DBTIntegrationTest(unittest.TestCase):
         results = handle(args)
         return results
 
+    def run_dbthelper_and_check(self, args):
+        """Like run_dbthelper, but return (results, exit_code)"""
+        args.extend(["--profiles-dir", self.dbt_config_dir])
+        return core.main.handle_and_check(args)
+
     def run_dbt(self, args):
         if args is None:
             args = ["run"]
@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils.catalog import CatalogCache, group_catalog_columns
+
+COLUMN_NAMES = (
+    "table_database",
+    "table_schema",
+    "table_name",
+    "table_type",
+    "column_name",
+    "column_index",
+    "column_type",
+)
+
+
+def make_row(schema, table, column, index):
+    return ("dbt", schema, table, "BASE TABLE", column, index, "integer")
+
+
+class GroupCatalogColumnsTest(unittest.TestCase):
+    def test_orders_columns_by_index(self):
+        rows = [
+            make_row("analytics", "users", "name", 2),
+            make_row("analytics", "users", "updated_at", 10),
+            make_row("analytics", "users", "id", 1),
+        ]
+        self.assertEqual(
+            group_catalog_columns(COLUMN_NAMES, rows),
+            {"analytics": {"users": ["id", "name", "updated_at"]}},
+        )
+
+    def test_several_schemas(self):
+        rows = [
+            make_row("staging", "orders", "id", 1),
+            make_row("analytics", "users", "id", 1),
+            make_row("analytics", "orders", "id", 1),
+            make_row("staging", "orders", "amount", 2),
+        ]
+        grouped = group_catalog_columns(COLUMN_NAMES, rows)
+        self.assertEqual(
+            grouped,
+            {
+                "analytics": {"orders": ["id"], "users": ["id"]},
+                "staging": {"orders": ["id", "amount"]},
+            },
+        )
+        self.assertEqual(list(grouped), ["analytics", "staging"])
+        self.assertEqual(list(grouped["analytics"]), ["orders", "users"])
+
+    def test_empty_catalog(self):
+        self.assertEqual(group_catalog_columns(COLUMN_NAMES, []), {})
+        self.assertEqual(group_catalog_columns([], []), {})
+
+
+class CatalogCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.target_path = tempfile.mkdtemp()
+        self.cache = CatalogCache(self.target_path, "columns", ttl=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.target_path)
+
+    def test_put_and_get(self):
+        self.cache.put("dbt", "analytics", {"users": ["id"]})
+        self.assertEqual(self.cache.get("dbt", "analytics"), {"users": ["id"]})
+        self.assertIsNone(self.cache.get("dbt", "staging"))
+
+    def test_failed_put_removes_temporary_file(self):
+        # a directory in the way of the snapshot makes the final move fail
+        path = self.cache.get_path("dbt", "analytics")
+        os.makedirs(path)
+        self.cache.put("dbt", "analytics", {"users": ["id"]})
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["analytics.json"])
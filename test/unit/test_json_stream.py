@@ -0,0 +1,100 @@
+import io
+import json
+import unittest
+
+from utils.json_stream import JsonStream, read_fields
+
+# Small chunk sizes force every token to straddle a buffer boundary
+CHUNK_SIZES = (1, 2, 3, 7, 64)
+
+
+def make_stream(value, chunk_size):
+    return JsonStream(io.StringIO(json.dumps(value)), chunk_size=chunk_size)
+
+
+class JsonStreamTest(unittest.TestCase):
+    def test_read_value(self):
+        values = [
+            "plain",
+            'escaped "quotes" inside',
+            "backslash \\ and \\\\ pairs",
+            "ends with a backslash \\",
+            "\\\"",
+            "unicode é and \n newlines",
+            [1, 2.5, None, True, False, "x"],
+            {"nested": {"list": [{"a": "b\\"}], "empty": {}}},
+            [],
+            {},
+            -12,
+        ]
+        for chunk_size in CHUNK_SIZES:
+            for value in values:
+                stream = make_stream(value, chunk_size)
+                self.assertEqual(stream.read_value(), value)
+                self.assertEqual(stream.peek(), "")
+
+    def test_skip_value(self):
+        skipped = [
+            'a "quoted\\" string',
+            "trailing backslashes \\\\\\",
+            ["[not a bracket]", "{nor a brace}", ["\\\"]"]],
+            {"}": "{", "k\\\"": [1, 2, {"deep": "\\\\"}]},
+            123.5,
+            None,
+        ]
+        for chunk_size in CHUNK_SIZES:
+            for value in skipped:
+                stream = make_stream([value, "after"], chunk_size)
+                items = stream.iter_array()
+                next(items)
+                stream.skip_value()
+                next(items)
+                self.assertEqual(stream.read_value(), "after")
+                self.assertEqual(list(items), [])
+
+    def test_iter_object(self):
+        value = {"a": 1, 'k"ey': "v", "empty": {}, "list": [1, [2]]}
+        for chunk_size in CHUNK_SIZES:
+            stream = make_stream(value, chunk_size)
+            decoded = {}
+            for key in stream.iter_object():
+                decoded[key] = stream.read_value()
+            self.assertEqual(decoded, value)
+
+    def test_read_fields(self):
+        value = {
+            "unique_id": "model.p.a",
+            "compiled_sql": "select \"x\" from y -- \\",
+            "depends_on": {"nodes": ["model.p.b"]},
+            "config": {"materialized": "view"},
+        }
+        for chunk_size in CHUNK_SIZES:
+            stream = make_stream([value, {"unique_id": "model.p.c"}], chunk_size)
+            records = []
+            for _ in stream.iter_array():
+                records.append(read_fields(stream, {"unique_id", "depends_on"}))
+            self.assertEqual(
+                records,
+                [
+                    {
+                        "unique_id": "model.p.a",
+                        "depends_on": {"nodes": ["model.p.b"]},
+                    },
+                    {"unique_id": "model.p.c"},
+                ],
+            )
+
+    def test_invalid_json(self):
+        stream = JsonStream(io.StringIO('["unterminated'), chunk_size=2)
+        with self.assertRaises(ValueError):
+            for _ in stream.iter_array():
+                stream.skip_value()
+
+        stream = JsonStream(io.StringIO("[1 2]"), chunk_size=2)
+        with self.assertRaises(ValueError):
+            for _ in stream.iter_array():
+                stream.read_value()
+
+        stream = JsonStream(io.StringIO('{"a" 1}'), chunk_size=2)
+        with self.assertRaises(ValueError):
+            list(stream.iter_object())
@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from utils import lineage
+
+
+def make_node(name, parents=(), tags=()):
+    return {
+        "unique_id": "model.my_project.{}".format(name),
+        "name": name,
+        "resource_type": "model",
+        "package_name": "my_project",
+        "root_path": "/project",
+        "original_file_path": "models/{}.sql".format(name),
+        "config": {"materialized": "view"},
+        "fqn": ["my_project", name],
+        "alias": name,
+        "schema": "analytics",
+        "depends_on": {"nodes": ["model.my_project.{}".format(p) for p in parents]},
+        "tags": list(tags),
+        "raw_sql": "select 1",
+    }
+
+
+class LoadLineageTest(unittest.TestCase):
+    def setUp(self):
+        self.target_path = tempfile.mkdtemp()
+        self.cache_path = lineage.get_cache_path(self.target_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.target_path)
+
+    def write_manifest(self, *nodes):
+        path = os.path.join(self.target_path, "manifest.json")
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "nodes": {node["unique_id"]: node for node in nodes},
+                    "sources": {},
+                    "macros": {},
+                },
+                f,
+            )
+        # make every rewrite look new, whatever the filesystem's mtime resolution
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(nodes)))
+
+    def test_reads_manifest(self):
+        self.write_manifest(make_node("a", tags=["finance"]), make_node("b", ["a"]))
+        result = lineage.load_lineage(self.target_path)
+        self.assertEqual(
+            result.parent_map,
+            {"model.my_project.a": [], "model.my_project.b": ["model.my_project.a"]},
+        )
+        self.assertEqual(result.nodes["model.my_project.a"]["tags"], ["finance"])
+        self.assertEqual(result.nodes["model.my_project.b"]["fqn"], "my_project.b")
+        self.assertTrue(os.path.isfile(self.cache_path))
+
+    def test_reads_cache(self):
+        self.write_manifest(make_node("a", tags=["finance"]), make_node("b", ["a"]))
+        first = lineage.load_lineage(self.target_path)
+        second = lineage.load_lineage(self.target_path)
+        self.assertEqual(second.nodes, first.nodes)
+        self.assertEqual(second.parent_map, first.parent_map)
+
+    def test_rewritten_manifest_invalidates_cache(self):
+        self.write_manifest(make_node("a"))
+        lineage.load_lineage(self.target_path)
+        self.write_manifest(make_node("a"), make_node("b", ["a"]))
+        result = lineage.load_lineage(self.target_path)
+        self.assertIn("model.my_project.b", result.nodes)
+
+    def test_corrupt_cache_is_rebuilt(self):
+        self.write_manifest(make_node("a"))
+        lineage.load_lineage(self.target_path)
+        with open(self.cache_path, "w") as f:
+            f.write("not a database")
+        result = lineage.load_lineage(self.target_path)
+        self.assertIn("model.my_project.a", result.nodes)
+        fingerprint = lineage.get_manifest_fingerprint(self.target_path)
+        self.assertIsNotNone(lineage.read_cache(self.cache_path, fingerprint))
+
+    def test_old_version_cache_is_rebuilt(self):
+        self.write_manifest(make_node("a"))
+        lineage.load_lineage(self.target_path)
+        conn = sqlite3.connect(self.cache_path)
+        with conn:
+            conn.execute("UPDATE meta SET value = '0:0:0' WHERE key = 'fingerprint'")
+            conn.execute("DELETE FROM nodes")
+        conn.close()
+        result = lineage.load_lineage(self.target_path)
+        self.assertIn("model.my_project.a", result.nodes)
+
+    def test_unwritable_cache_directory(self):
+        # a file where the cache directory should be makes the cache unwritable,
+        # even when the tests run as root
+        with open(os.path.join(self.target_path, lineage.CACHE_DIR), "w"):
+            pass
+        self.write_manifest(make_node("a"))
+        result = lineage.load_lineage(self.target_path)
+        self.assertIn("model.my_project.a", result.nodes)
+
+    def test_failed_write_removes_temporary_file(self):
+        # a directory in the way of the cache file makes the final move fail
+        os.makedirs(self.cache_path)
+        self.write_manifest(make_node("a"))
+        result = lineage.load_lineage(self.target_path)
+        self.assertIn("model.my_project.a", result.nodes)
+        self.assertEqual(os.listdir(os.path.dirname(self.cache_path)), ["lineage.db"])
@@ -0,0 +1,85 @@
+import unittest
+
+from utils.graph import DependencyGraph
+from utils.retry_plan import (
+    chunk_args,
+    find_clusters,
+    get_affected_nodes,
+    plan_retry,
+)
+
+
+class GetAffectedNodesTest(unittest.TestCase):
+    def test_skipped_behind_errored(self):
+        graph = DependencyGraph({"a": [], "b": ["a"], "c": ["b"]})
+        self.assertEqual(
+            get_affected_nodes(graph, ["a"], ["b", "c"], {"x"}), ["b", "c"]
+        )
+
+    def test_skipped_behind_ephemeral(self):
+        # dbt writes no run result for the ephemeral model e, but still skips c
+        graph = DependencyGraph({"a": [], "e": ["a"], "c": ["e"]})
+        self.assertEqual(get_affected_nodes(graph, ["a"], ["c"]), ["c"])
+
+    def test_stops_at_succeeded(self):
+        # b ran fine, so a is not why d was skipped
+        graph = DependencyGraph({"a": [], "b": ["a"], "d": ["b"]})
+        self.assertEqual(get_affected_nodes(graph, ["a"], ["d"], {"b"}), [])
+
+
+class FindClustersTest(unittest.TestCase):
+    def test_independent_failures(self):
+        graph = DependencyGraph({"a": [], "b": ["a"], "x": [], "y": ["x"]})
+        self.assertEqual(
+            find_clusters(graph, ["a", "x", "b", "y"]), [["a", "b"], ["x", "y"]]
+        )
+
+    def test_joined_through_ephemeral(self):
+        graph = DependencyGraph({"a": [], "e": ["a"], "c": ["e"]})
+        self.assertEqual(find_clusters(graph, ["a", "c"]), [["a", "c"]])
+
+    def test_not_joined_through_succeeded(self):
+        graph = DependencyGraph({"a": [], "b": ["a"], "c": ["b"]})
+        self.assertEqual(find_clusters(graph, ["a", "c"], {"b"}), [["a"], ["c"]])
+
+    def test_missing_from_graph(self):
+        graph = DependencyGraph({"a": []})
+        self.assertEqual(find_clusters(graph, ["a", "z"]), [["a"], ["z"]])
+
+
+class PlanRetryTest(unittest.TestCase):
+    def test_largest_cluster_first(self):
+        graph = DependencyGraph(
+            {"a": [], "e": ["a"], "c": ["e"], "d": ["c"], "x": [], "y": ["x"]}
+        )
+        plan = plan_retry(graph, ["x", "a"], ["y", "c", "d"])
+        self.assertEqual([cluster.roots for cluster in plan], [["a"], ["x"]])
+        self.assertEqual(
+            [cluster.descendants for cluster in plan], [["c", "d"], ["y"]]
+        )
+
+
+class ChunkArgsTest(unittest.TestCase):
+    def test_fits_in_one_batch(self):
+        self.assertEqual(chunk_args(["aa", "bb"], 100), [["aa", "bb"]])
+
+    def test_exact_boundary(self):
+        # each argument counts one extra character for its separator
+        self.assertEqual(chunk_args(["aa", "bb"], 6), [["aa", "bb"]])
+        self.assertEqual(chunk_args(["aa", "bb"], 5), [["aa"], ["bb"]])
+
+    def test_keeps_order(self):
+        args = ["arg_{}".format(i) for i in range(100)]
+        batches = chunk_args(args, 30)
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([arg for batch in batches for arg in batch], args)
+        for batch in batches:
+            self.assertLessEqual(sum(len(arg) + 1 for arg in batch), 30)
+
+    def test_argument_longer_than_max_length(self):
+        self.assertEqual(
+            chunk_args(["a", "x" * 20, "b"], 10), [["a"], ["x" * 20], ["b"]]
+        )
+
+    def test_no_args(self):
+        self.assertEqual(chunk_args([], 10), [])
@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from utils import run_history
+
+
+def make_result(name, execution_time, status=None, skip=False):
+    return {
+        "node": {"unique_id": "model.my_project.{}".format(name), "name": name},
+        "status": status,
+        "skip": skip,
+        "execution_time": execution_time,
+        "thread_id": "Thread-1",
+    }
+
+
+class RunHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.target_path = tempfile.mkdtemp()
+        self.conn = run_history.connect(self.target_path)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.target_path)
+
+    def add_run(self, results):
+        path = os.path.join(self.target_path, "run_results.json")
+        with open(path, "w") as f:
+            json.dump({"results": results}, f)
+        # make every run look new, whatever the filesystem's mtime resolution
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(results)))
+        self.assertTrue(run_history.ingest_run_results(self.conn, self.target_path))
+
+    def test_ingest_once(self):
+        self.add_run([make_result("a", 1.0)])
+        self.assertFalse(run_history.ingest_run_results(self.conn, self.target_path))
+
+    def test_slowest_skips_unsuccessful(self):
+        self.add_run(
+            [
+                make_result("a", 1.0),
+                make_result("b", 2.0, status="ERROR"),
+                make_result("c", 0.0, skip=True),
+            ]
+        )
+        rows = run_history.get_slowest(self.conn, 10)
+        self.assertEqual([row[0] for row in rows], ["a"])
+
+    def test_regressions_ignore_zero_average(self):
+        self.add_run([make_result("a", 0.0), make_result("b", 1.0)])
+        self.add_run([make_result("a", 3.0), make_result("b", 3.0), make_result("c", 1)])
+        rows = run_history.get_regressions(self.conn, 5, 1.5, 10)
+        self.assertEqual(rows, [("b", 3.0, 1.0)])
@@ -0,0 +1,24 @@
+import unittest
+
+from test.benchmark.bench_startup import get_imported_modules
+
+# Modules that the file-only sub-commands must not import at startup
+HEAVY_MODULES = ("dbt", "jinja2", "agate", "networkx")
+
+
+class StartupTest(unittest.TestCase):
+    def check_startup(self, command):
+        modules = get_imported_modules(command)
+        # make sure the subprocess really reported its modules
+        self.assertIn("core.main", modules)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_find_startup(self):
+        self.check_startup("find")
+
+    def test_open_startup(self):
+        self.check_startup("open")
+
+    def test_timing_startup(self):
+        self.check_startup("timing")
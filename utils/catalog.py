@@ -0,0 +1,106 @@
+import json
+import os
+import time
+
+from utils.lineage import CACHE_DIR
+
+
+def group_catalog_columns(column_names, rows):
+    """
+    Group the rows of a catalog table (as returned by the adapter's
+    get_catalog macro) into {schema: {table: [column names]}} in a single
+    pass. Schemas and tables are sorted by name and columns by their index
+    in the table.
+    """
+    if not column_names:
+        return {}
+
+    schema_idx = column_names.index("table_schema")
+    table_idx = column_names.index("table_name")
+    column_idx = column_names.index("column_name")
+    index_idx = column_names.index("column_index")
+
+    grouped = {}
+    for row in rows:
+        # the catalog macro's output isn't cast to text, so names can come
+        # back as other types
+        schema = str(row[schema_idx])
+        table = str(row[table_idx])
+        tables = grouped.get(schema)
+        if tables is None:
+            tables = grouped[schema] = {}
+        columns = tables.get(table)
+        if columns is None:
+            columns = tables[table] = []
+        columns.append((row[index_idx], row[column_idx]))
+
+    return {
+        schema: {
+            table: [name for _, name in sorted(columns)]
+            for table, columns in sorted(tables.items())
+        }
+        for schema, tables in sorted(grouped.items())
+    }
+
+
+class CatalogCache:
+    """
+    Snapshots of warehouse metadata stored under the target directory, one
+    JSON file per (database, schema) in target/dbt_helper/catalog/<kind>/.
+
+    A snapshot older than ttl seconds is treated as missing; a ttl of 0
+    disables reads altogether. refresh lists the schemas whose snapshots
+    must be ignored (and dropped): None means none, an empty list means all.
+    """
+
+    def __init__(self, target_path, kind, ttl, refresh=None):
+        self.directory = os.path.join(target_path, CACHE_DIR, "catalog", kind)
+        self.ttl = ttl
+        self.refresh = refresh
+
+    def get_path(self, database, schema):
+        return os.path.join(self.directory, str(database), "{}.json".format(schema))
+
+    def is_refreshing(self, schema):
+        if self.refresh is None:
+            return False
+        return not self.refresh or schema in self.refresh
+
+    def get(self, database, schema):
+        """Return the cached data for a schema, or None if it's missing/expired"""
+        if self.is_refreshing(schema):
+            self.invalidate(database, schema)
+            return None
+        if not self.ttl:
+            return None
+        path = self.get_path(database, schema)
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (IOError, ValueError):
+            return None
+        if time.time() - snapshot["created_at"] > self.ttl:
+            return None
+        return snapshot["data"]
+
+    def invalidate(self, database, schema):
+        try:
+            os.remove(self.get_path(database, schema))
+        except OSError:
+            pass
+
+    def put(self, database, schema, data):
+        path = self.get_path(database, schema)
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"created_at": time.time(), "data": data}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The cache is only an optimization; a read-only target directory
+            # shouldn't stop the command from working.
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,216 @@
+import heapq
+import math
+from array import array
+from collections import deque
+
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+
+
+class DependencyGraph:
+    """
+    A compact, read-only dependency graph built from a parent map
+    ({node: [parents]}).
+
+    Nodes are numbered 0..n-1. Each direction is stored CSR-style: a flat
+    array of neighbour ids plus an array of offsets into it, so the parents
+    of node i are parents[parent_offsets[i]:parent_offsets[i + 1]]. Both
+    directions share the same node numbering, and neighbours keep the order
+    in which they first appear in the parent map.
+    """
+
+    __slots__ = (
+        "names",
+        "ids",
+        "parent_offsets",
+        "parents",
+        "child_offsets",
+        "children",
+    )
+
+    def __init__(self, parent_map):
+        self.names = list(parent_map)
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        self.parents = array("l")
+        self.parent_offsets = array("l", [0])
+        for name in list(self.names):
+            # a model that refs the same parent twice lists it twice
+            for parent in dict.fromkeys(parent_map[name]):
+                self.parents.append(self._get_or_add_id(parent))
+            self.parent_offsets.append(len(self.parents))
+        # nodes that only appear as parents have no parents of their own
+        while len(self.parent_offsets) <= len(self.names):
+            self.parent_offsets.append(len(self.parents))
+
+        # reverse the parent arrays with a counting sort
+        num_nodes = len(self.names)
+        self.child_offsets = array("l", [0] * (num_nodes + 1))
+        for parent in self.parents:
+            self.child_offsets[parent + 1] += 1
+        for i in range(num_nodes):
+            self.child_offsets[i + 1] += self.child_offsets[i]
+
+        self.children = array("l", [0] * len(self.parents))
+        positions = array("l", self.child_offsets[:num_nodes])
+        for child in range(num_nodes):
+            start, end = self.parent_offsets[child], self.parent_offsets[child + 1]
+            for parent in self.parents[start:end]:
+                self.children[positions[parent]] = child
+                positions[parent] += 1
+
+    def _get_or_add_id(self, name):
+        node_id = self.ids.get(name)
+        if node_id is None:
+            node_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return node_id
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def _neighbour_ids(self, node_id, direction):
+        if direction == UPSTREAM:
+            offsets, neighbours = self.parent_offsets, self.parents
+        else:
+            offsets, neighbours = self.child_offsets, self.children
+        return neighbours[offsets[node_id]:offsets[node_id + 1]]
+
+    def predecessors(self, name):
+        node_id = self.ids[name]
+        return [self.names[i] for i in self._neighbour_ids(node_id, UPSTREAM)]
+
+    def successors(self, name):
+        node_id = self.ids[name]
+        return [self.names[i] for i in self._neighbour_ids(node_id, DOWNSTREAM)]
+
+    def _reach(self, start_ids, direction, depths, include=None):
+        """
+        Return the ids reachable from start_ids, in the order they are
+        visited. depths maps start ids to the maximum number of hops to
+        follow from them; start ids that aren't in it are unbounded. If
+        include is given, nodes it rejects (by name) are neither returned nor
+        walked through; the start nodes are always kept.
+        """
+        if not depths:
+            seen = bytearray(len(self.names))
+            queue = deque()
+            for node_id in start_ids:
+                if not seen[node_id]:
+                    seen[node_id] = 1
+                    queue.append(node_id)
+
+            reached = []
+            while queue:
+                node_id = queue.popleft()
+                reached.append(node_id)
+                for neighbour in self._neighbour_ids(node_id, direction):
+                    if not seen[neighbour]:
+                        seen[neighbour] = 1
+                        if include is None or include(self.names[neighbour]):
+                            queue.append(neighbour)
+            return reached
+
+        # Seeds can have different depths, so a node reached through a
+        # shallow seed may still need to be expanded for a deeper one. Taking
+        # nodes in order of the most hops they have left settles each node
+        # once, with the largest budget any seed gives it.
+        budget = {}
+        heap = []
+        for node_id in start_ids:
+            remaining = depths.get(node_id, math.inf)
+            if remaining > budget.get(node_id, -1):
+                budget[node_id] = remaining
+                heapq.heappush(heap, (-remaining, node_id))
+
+        # 0: not seen yet, 1: settled, 2: rejected by include
+        state = bytearray(len(self.names))
+        reached = []
+        while heap:
+            remaining, node_id = heapq.heappop(heap)
+            if state[node_id]:
+                continue
+            state[node_id] = 1
+            reached.append(node_id)
+            remaining = -remaining - 1
+            if remaining < 0:
+                continue
+            for neighbour in self._neighbour_ids(node_id, direction):
+                if state[neighbour] or remaining <= budget.get(neighbour, -1):
+                    continue
+                if include is not None and not include(self.names[neighbour]):
+                    state[neighbour] = 2
+                    continue
+                budget[neighbour] = remaining
+                heapq.heappush(heap, (-remaining, neighbour))
+        return reached
+
+    def walk(self, start_nodes, direction, depths=None, include=None):
+        """
+        Return the set of nodes reachable from start_nodes (including them)
+        following parents (upstream) or children (downstream). depths
+        optionally maps start nodes to the maximum number of hops to follow
+        from them, and include is an optional predicate on node names that
+        prunes the walk. Every reachable node is visited exactly once.
+        """
+        start_ids = [self.ids[name] for name in start_nodes]
+        depths = {self.ids[name]: depth for name, depth in (depths or {}).items()}
+        reached = self._reach(start_ids, direction, depths, include)
+        return set(self.names[i] for i in reached)
+
+    def levels(
+        self, start_nodes, direction, longest=True, depths=None, include=None
+    ):
+        """
+        Return {node: level} for every node reachable from start_nodes (see
+        walk), where the start nodes are level 0 and a node's level is the
+        length of the longest (or, with longest=False, the shortest) path
+        that reaches it within the reachable subgraph. Each node is processed
+        exactly once: the shortest levels fall out of a breadth-first walk,
+        and the longest ones are relaxed in topological order.
+        """
+        start_ids = list(dict.fromkeys(self.ids[name] for name in start_nodes))
+        depths = {self.ids[name]: depth for name, depth in (depths or {}).items()}
+        order = self._reach(start_ids, direction, depths, include)
+        level = dict.fromkeys(order)
+
+        if not longest:
+            queue = deque(start_ids)
+            for node_id in start_ids:
+                level[node_id] = 0
+            while queue:
+                node_id = queue.popleft()
+                for neighbour in self._neighbour_ids(node_id, direction):
+                    if neighbour in level and level[neighbour] is None:
+                        level[neighbour] = level[node_id] + 1
+                        queue.append(neighbour)
+            return {self.names[node_id]: level[node_id] for node_id in order}
+
+        # count in-edges within the reachable subgraph, then relax each node
+        # once all of its predecessors (in the walk direction) are settled
+        in_degree = dict.fromkeys(order, 0)
+        for node_id in order:
+            for neighbour in self._neighbour_ids(node_id, direction):
+                if neighbour in in_degree:
+                    in_degree[neighbour] += 1
+
+        level = dict.fromkeys(order, 0)
+        ready = deque(node_id for node_id in order if in_degree[node_id] == 0)
+        settled = []
+        while ready:
+            node_id = ready.popleft()
+            settled.append(node_id)
+            for neighbour in self._neighbour_ids(node_id, direction):
+                if neighbour not in in_degree:
+                    continue
+                level[neighbour] = max(level[neighbour], level[node_id] + 1)
+                in_degree[neighbour] -= 1
+                if in_degree[neighbour] == 0:
+                    ready.append(neighbour)
+
+        if len(settled) < len(order):
+            raise Exception("Found a cycle in the dependency graph")
+        return {self.names[node_id]: level[node_id] for node_id in settled}
@@ -0,0 +1,67 @@
+import csv
+import json
+
+
+def write_json(f, nodes, edges):
+    """
+    Write {"nodes": [...], "edges": [{"parent": ..., "child": ...}]}. Nodes
+    and edges are written as they are produced rather than collected into a
+    document first, so both can be generators.
+    """
+    f.write('{"nodes": [')
+    for i, node in enumerate(nodes):
+        f.write(",\n  " if i else "\n  ")
+        f.write(json.dumps(node))
+    f.write('\n], "edges": [')
+    for i, (parent, child) in enumerate(edges):
+        f.write(",\n  " if i else "\n  ")
+        f.write(json.dumps({"parent": parent, "child": child}))
+    f.write("\n]}\n")
+
+
+def write_dot(f, nodes, edges):
+    """Write a Graphviz digraph with one labelled vertex per node"""
+    f.write("digraph dependencies {\n")
+    for node in nodes:
+        attributes = ", ".join(
+            "{}={}".format(key, json.dumps(str(node[key])))
+            for key in ("resource_type", "materialized", "level")
+        )
+        f.write(
+            "  {} [label={}, {}];\n".format(
+                json.dumps(node["unique_id"]), json.dumps(node["alias"]), attributes
+            )
+        )
+    for parent, child in edges:
+        f.write("  {} -> {};\n".format(json.dumps(parent), json.dumps(child)))
+    f.write("}\n")
+
+
+CSV_COLUMNS = (
+    "kind",
+    "unique_id",
+    "alias",
+    "resource_type",
+    "materialized",
+    "level",
+    "parent",
+)
+
+
+def write_csv(f, nodes, edges):
+    """
+    Write a single table with one "node" row per node, holding its metadata,
+    followed by one "edge" row per edge, whose unique_id is the child. Nodes
+    without edges still get their row.
+    """
+    writer = csv.writer(f)
+    writer.writerow(CSV_COLUMNS)
+    for node in nodes:
+        writer.writerow(
+            ["node"] + [node[column] for column in CSV_COLUMNS[1:-1]] + [""]
+        )
+    for parent, child in edges:
+        writer.writerow(("edge", child, "", "", "", "", parent))
+
+
+WRITERS = {"json": write_json, "dot": write_dot, "csv": write_csv}
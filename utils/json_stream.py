@@ -0,0 +1,207 @@
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = " \t\n\r"
+STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*')
+CONTAINER_SPECIAL = re.compile(r'["\[\]{}]')
+SCALAR_END = re.compile(r"[\s,\]}]")
+
+
+class JsonStream:
+    """
+    A minimal incremental JSON reader. It walks a file a chunk at a time and
+    lets the caller decide, value by value, whether to decode it or skip over
+    it. Skipped values (e.g. compiled SQL or macros in manifest.json) are
+    never materialized, so memory stays bounded by the chunk size plus the
+    values that are actually decoded.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.mark = None
+        self.eof = False
+
+    def _fill(self):
+        """Read another chunk, dropping whatever has already been consumed"""
+        if self.eof:
+            return False
+        keep_from = self.pos if self.mark is None else self.mark
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[keep_from:] + chunk
+        self.pos -= keep_from
+        if self.mark is not None:
+            self.mark -= keep_from
+        if not chunk:
+            self.eof = True
+        return bool(chunk)
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it"""
+        while True:
+            while self.pos < len(self.buf):
+                char = self.buf[self.pos]
+                if char not in WHITESPACE:
+                    return char
+                self.pos += 1
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                "Invalid JSON: expected '{}' but found '{}'".format(char, found)
+            )
+        self.pos += 1
+
+    def _search(self, pattern):
+        """Return the position of the next match of pattern, reading as needed"""
+        while True:
+            match = pattern.search(self.buf, self.pos)
+            if match is not None:
+                return match.start()
+            self.pos = len(self.buf)
+            if not self._fill():
+                raise ValueError("Invalid JSON: unexpected end of file")
+
+    def _skip_string(self):
+        # Look for the next quote and check whether it is escaped by counting
+        # the backslashes in front of it. str.find runs in C, which is much
+        # faster than a regex on strings full of escapes (e.g. compiled SQL).
+        self.pos += 1  # opening quote
+        while True:
+            end = self.buf.find('"', self.pos)
+            if end == -1:
+                # keep any trailing backslashes so the next quote's escaping
+                # can still be decided after the buffer is refilled
+                self.pos = len(self.buf) - self._count_backslashes(len(self.buf))
+                if not self._fill():
+                    raise ValueError("Invalid JSON: unexpected end of file")
+                continue
+            if self._count_backslashes(end) % 2 == 0:
+                self.pos = end + 1
+                return
+            self.pos = end + 1
+
+    def _count_backslashes(self, end):
+        """Return the number of consecutive backslashes just before end"""
+        start = end
+        while start > 0 and self.buf[start - 1] == "\\":
+            start -= 1
+        return end - start
+
+    def _skip_container(self):
+        depth = 0
+        while True:
+            end = self._search(CONTAINER_SPECIAL)
+            char = self.buf[end]
+            self.pos = end
+            if char == '"':
+                self._skip_string()
+                continue
+            self.pos += 1
+            if char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _skip_scalar(self):
+        while True:
+            match = SCALAR_END.search(self.buf, self.pos)
+            if match is not None:
+                self.pos = match.start()
+                return
+            self.pos = len(self.buf)
+            if not self._fill():
+                return
+
+    def skip_value(self):
+        """Consume the next value without decoding it"""
+        char = self.peek()
+        if char == '"':
+            self._skip_string()
+        elif char in ("[", "{"):
+            self._skip_container()
+        elif char:
+            self._skip_scalar()
+        else:
+            raise ValueError("Invalid JSON: unexpected end of file")
+
+    def read_value(self):
+        """Consume and decode the next value"""
+        if self.peek() == '"':
+            # Fast path for plain strings (e.g. object keys) in the buffer
+            match = STRING.match(self.buf, self.pos)
+            if match is not None and "\\" not in match.group():
+                self.pos = match.end()
+                return match.group()[1:-1]
+
+        self.mark = self.pos
+        try:
+            self.skip_value()
+            text = self.buf[self.mark:self.pos]
+        finally:
+            self.mark = None
+        return json.loads(text)
+
+    def iter_object(self):
+        """
+        Iterate over the keys of the next object. After each key is yielded,
+        the caller must consume its value with read_value, skip_value or a
+        nested iter_object/iter_array before asking for the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(
+                    "Invalid JSON: expected ',' or '}}' but found '{}'".format(char)
+                )
+
+    def iter_array(self):
+        """
+        Iterate over the items of the next array. The caller must consume each
+        item (see iter_object) before asking for the next one.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(
+                    "Invalid JSON: expected ',' or ']' but found '{}'".format(char)
+                )
+
+
+def read_fields(stream, fields):
+    """Decode the listed keys of the next object and skip everything else"""
+    record = {}
+    for key in stream.iter_object():
+        if key in fields:
+            record[key] = stream.read_value()
+        else:
+            stream.skip_value()
+    return record
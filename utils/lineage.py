@@ -0,0 +1,281 @@
+import os
+import sqlite3
+from collections import namedtuple
+
+import utils.manifest
+from utils.model_index import ModelIndex
+
+CACHE_DIR = "dbt_helper"
+CACHE_FILE = "lineage.db"
+CACHE_VERSION = "3"
+
+NODE_FIELDS = (
+    "unique_id",
+    "name",
+    "resource_type",
+    "package_name",
+    "root_path",
+    "original_file_path",
+    "materialized",
+    "alias",
+    "fqn",
+)
+
+# nodes: {unique_id: {field: value}} for every node and source, with the
+# scalar NODE_FIELDS plus a list of "tags"
+# parent_map: {unique_id: [parent unique_ids]}
+# index: a ModelIndex for name lookups
+Lineage = namedtuple("Lineage", ["nodes", "parent_map", "index"])
+
+
+def get_display_alias(node):
+    if node["resource_type"] == "source":
+        return "{}.{}".format(node["schema"], node["name"])
+    if len(node["fqn"]) == 3:
+        schema = node["fqn"][1]
+    else:
+        schema = node["fqn"][0]
+    return "{}.{}".format(schema, node["alias"])
+
+
+def make_node_record(node):
+    if node["resource_type"] == "source":
+        materialized = "source"
+    else:
+        materialized = node["config"]["materialized"]
+    return {
+        "unique_id": node["unique_id"],
+        "name": node["name"],
+        "resource_type": node["resource_type"],
+        "package_name": node["package_name"],
+        "root_path": node["root_path"],
+        "original_file_path": node["original_file_path"],
+        "materialized": materialized,
+        "alias": get_display_alias(node),
+        # dotted, as accepted by dbt's --models selector
+        "fqn": ".".join(node["fqn"]),
+        "tags": list(node.get("tags", [])),
+    }
+
+
+def make_parsed_node_record(node):
+    """
+    Like make_node_record, for a node or source parsed by dbt. Only the
+    attributes needed are read; serializing the whole node with to_dict()
+    would also copy its SQL and full config, for every node in the project.
+    """
+    resource_type = str(node.resource_type)
+    return make_node_record(
+        {
+            "unique_id": node.unique_id,
+            "name": node.name,
+            "resource_type": resource_type,
+            "package_name": node.package_name,
+            "root_path": node.root_path,
+            "original_file_path": node.original_file_path,
+            "config": {
+                "materialized": None
+                if resource_type == "source"
+                else node.config.materialized
+            },
+            "fqn": node.fqn,
+            "alias": getattr(node, "alias", None),
+            "schema": node.schema,
+            "tags": node.tags,
+        }
+    )
+
+
+# The manifest fields needed to build a node record
+MANIFEST_FIELDS = {
+    "unique_id",
+    "name",
+    "resource_type",
+    "package_name",
+    "root_path",
+    "original_file_path",
+    "config",
+    "fqn",
+    "alias",
+    "schema",
+    "depends_on",
+    "tags",
+}
+
+
+def make_lineage(nodes, parent_map):
+    return Lineage(nodes=nodes, parent_map=parent_map, index=ModelIndex(nodes))
+
+
+def build_parsed_lineage(manifest):
+    """Build a Lineage from a Manifest object returned by dbt's parser"""
+    nodes = {}
+    parent_map = {}
+
+    for unique_id, node in manifest.nodes.items():
+        nodes[unique_id] = make_parsed_node_record(node)
+        parent_map[unique_id] = list(node.depends_on.nodes)
+
+    for unique_id, source in manifest.sources.items():
+        nodes[unique_id] = make_parsed_node_record(source)
+        parent_map[unique_id] = []
+
+    return make_lineage(nodes, parent_map)
+
+
+def read_lineage(target_path):
+    """
+    Build a Lineage by streaming the manifest.json file in target_path. Only
+    the fields in MANIFEST_FIELDS are decoded, so peak memory is independent
+    of how much compiled SQL, documentation and macros the manifest holds.
+    """
+    nodes = {}
+    parent_map = {}
+
+    for section, unique_id, node in utils.manifest.iter_manifest_nodes(
+        target_path, MANIFEST_FIELDS
+    ):
+        nodes[unique_id] = make_node_record(node)
+        if section == "nodes":
+            parent_map[unique_id] = list(node["depends_on"]["nodes"])
+        else:
+            parent_map[unique_id] = []
+
+    return make_lineage(nodes, parent_map)
+
+
+def get_cache_path(target_path):
+    return os.path.join(target_path, CACHE_DIR, CACHE_FILE)
+
+
+def get_manifest_fingerprint(target_path):
+    stat = os.stat(utils.manifest.get_manifest_path(target_path))
+    return "{}:{}:{}".format(CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+
+
+def read_cache(cache_path, fingerprint):
+    """Return the cached Lineage, or None if the cache is missing or stale"""
+    if not os.path.isfile(cache_path):
+        return None
+
+    conn = sqlite3.connect(cache_path)
+    try:
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key = 'fingerprint'"
+        ).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+
+        nodes = {}
+        parent_map = {}
+        for values in conn.execute(
+            "SELECT {} FROM nodes".format(", ".join(NODE_FIELDS))
+        ):
+            node = dict(zip(NODE_FIELDS, values))
+            node["tags"] = []
+            nodes[node["unique_id"]] = node
+            parent_map[node["unique_id"]] = []
+
+        for unique_id, tag in conn.execute(
+            "SELECT unique_id, tag FROM tags ORDER BY rowid"
+        ):
+            nodes[unique_id]["tags"].append(tag)
+
+        for parent, child in conn.execute(
+            "SELECT parent, child FROM edges ORDER BY rowid"
+        ):
+            parent_map.setdefault(child, []).append(parent)
+    except sqlite3.DatabaseError:
+        return None
+    finally:
+        conn.close()
+
+    return make_lineage(nodes, parent_map)
+
+
+def write_cache(cache_path, fingerprint, lineage):
+    """
+    Write the lineage to a fresh database file and move it into place, so a
+    concurrent reader never sees a half-written cache.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(cache_path, os.getpid())
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    try:
+        _write_cache_file(tmp_path, fingerprint, lineage)
+        os.replace(tmp_path, cache_path)
+    except (OSError, sqlite3.DatabaseError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_cache_file(path, fingerprint, lineage):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute(
+            "CREATE TABLE nodes ({}, PRIMARY KEY (unique_id))".format(
+                ", ".join("{} TEXT".format(field) for field in NODE_FIELDS)
+            )
+        )
+        conn.execute("CREATE TABLE edges (parent TEXT, child TEXT)")
+        conn.execute("CREATE TABLE tags (unique_id TEXT, tag TEXT)")
+
+        conn.executemany(
+            "INSERT INTO nodes VALUES ({})".format(", ".join("?" * len(NODE_FIELDS))),
+            (
+                tuple(node[field] for field in NODE_FIELDS)
+                for node in lineage.nodes.values()
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO edges VALUES (?, ?)",
+            (
+                (parent, child)
+                for child, parents in lineage.parent_map.items()
+                for parent in parents
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO tags VALUES (?, ?)",
+            (
+                (unique_id, tag)
+                for unique_id, node in lineage.nodes.items()
+                for tag in node["tags"]
+            ),
+        )
+        conn.execute(
+            "INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def load_lineage(target_path):
+    """
+    Return the Lineage for the manifest.json file in target_path. The lineage
+    is cached in target/dbt_helper/lineage.db and keyed by the mtime and size
+    of manifest.json, so it is rebuilt automatically whenever dbt rewrites the
+    manifest. If the cache can't be written, the lineage is still returned.
+    """
+    cache_path = get_cache_path(target_path)
+    try:
+        fingerprint = get_manifest_fingerprint(target_path)
+    except OSError:
+        # read_lineage raises a helpful error if the manifest doesn't exist
+        return read_lineage(target_path)
+
+    lineage = read_cache(cache_path, fingerprint)
+    if lineage is not None:
+        return lineage
+
+    lineage = read_lineage(target_path)
+    try:
+        write_cache(cache_path, fingerprint, lineage)
+    except (OSError, sqlite3.DatabaseError):
+        pass
+    return lineage
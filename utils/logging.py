@@ -11,3 +11,12 @@ stdout_handler.setLevel(NOTICE)
 logger = logging.getLogger("dbt")
 logger.addHandler(stdout_handler)
 logger.setLevel(DEBUG)
+
+
+def log_to_stderr():
+    """
+    Send log messages to stderr, for commands that write machine-readable
+    output to stdout
+    """
+    stdout_handler.flush()
+    stdout_handler.stream = sys.stderr
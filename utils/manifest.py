@@ -0,0 +1,98 @@
+import os
+
+import yaml
+
+from utils.json_stream import JsonStream, read_fields
+
+MANIFEST_FILE = "manifest.json"
+COMPILATION_MESSAGE = "You may need to run dbt compile first."
+
+
+def get_manifest_path(target_path):
+    return os.path.join(target_path, MANIFEST_FILE)
+
+
+def get_target_path(args):
+    """
+    Read the target path straight from dbt_project.yml. Loading the full dbt
+    RuntimeConfig (and profile) is only needed if the value is templated,
+    which keeps dbt's imports out of the commands that only read files from
+    the target directory.
+    """
+    project_dir = args.project_dir or os.getcwd()
+    with open(os.path.join(project_dir, "dbt_project.yml")) as f:
+        project = yaml.safe_load(f) or {}
+
+    target_path = project.get("target-path", "target")
+    if "{" in str(target_path):
+        from dbt.config import RuntimeConfig
+
+        target_path = RuntimeConfig.from_args(args).target_path
+    return target_path
+
+
+def iter_manifest_nodes(target_path, fields, sections=("nodes", "sources")):
+    """
+    Stream the manifest.json file and yield (section, unique_id, record) for
+    every entry of the requested top-level sections, where record only holds
+    the requested fields. Everything else (compiled SQL, macros, docs, ...) is
+    skipped without being decoded, and reading stops as soon as the requested
+    sections have been seen.
+    """
+    manifest_path = get_manifest_path(target_path)
+    try:
+        f = open(manifest_path)
+    except IOError:
+        raise Exception(
+            "Could not find {} file. {}".format(MANIFEST_FILE, COMPILATION_MESSAGE)
+        )
+
+    with f:
+        stream = JsonStream(f)
+        remaining = set(sections)
+        for key in stream.iter_object():
+            if key not in remaining:
+                stream.skip_value()
+                continue
+            for unique_id in stream.iter_object():
+                yield key, unique_id, read_fields(stream, fields)
+            remaining.discard(key)
+            if not remaining:
+                return
+
+
+def get_project_paths(config):
+    """Return the files and directories whose contents feed the manifest"""
+    paths = [os.path.join(config.project_root, "dbt_project.yml")]
+    for path_list in (
+        config.source_paths,
+        config.macro_paths,
+        config.data_paths,
+        config.snapshot_paths,
+        config.docs_paths,
+    ):
+        paths.extend(os.path.join(config.project_root, p) for p in path_list)
+    paths.append(os.path.join(config.project_root, config.modules_path))
+    return paths
+
+
+def manifest_is_stale(config):
+    """
+    Return True if manifest.json is missing, or if any project file has been
+    modified since dbt last wrote it.
+    """
+    manifest_path = get_manifest_path(config.target_path)
+    if not os.path.isfile(manifest_path):
+        return True
+
+    manifest_mtime = os.path.getmtime(manifest_path)
+    for path in get_project_paths(config):
+        if os.path.isfile(path):
+            if os.path.getmtime(path) > manifest_mtime:
+                return True
+            continue
+        for root, _, files in os.walk(path):
+            for name in files:
+                if os.path.getmtime(os.path.join(root, name)) > manifest_mtime:
+                    return True
+    return False
@@ -0,0 +1,55 @@
+AMBIGUOUS_NAME_MESSAGE = (
+    "The name '{}' matches more than one node: {}. "
+    "Qualify it with its package name (e.g. {}) to pick one."
+)
+
+
+class ModelIndex:
+    """
+    Constant-time lookups of nodes by name. Built once per manifest load from
+    the node records of a Lineage ({unique_id: {"name": ..., ...}}).
+
+    Names can be given bare ("my_model") or qualified with their package
+    ("my_package.my_model").
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.by_name = {}
+        self.by_qualified_name = {}
+        self.by_resource_type = {}
+        self.by_tag = {}
+
+        for unique_id, node in nodes.items():
+            qualified_name = "{}.{}".format(node["package_name"], node["name"])
+            self.by_name.setdefault(node["name"], []).append(unique_id)
+            self.by_qualified_name.setdefault(qualified_name, []).append(unique_id)
+            self.by_resource_type.setdefault(node["resource_type"], set()).add(
+                unique_id
+            )
+            for tag in node["tags"]:
+                self.by_tag.setdefault(tag, []).append(unique_id)
+
+    def lookup(self, name, resource_type=None):
+        """Return the unique_ids of every node matching name"""
+        unique_ids = self.by_name.get(name)
+        if unique_ids is None:
+            unique_ids = self.by_qualified_name.get(name, [])
+        if resource_type is not None:
+            of_type = self.by_resource_type.get(resource_type, set())
+            unique_ids = [unique_id for unique_id in unique_ids if unique_id in of_type]
+        return list(unique_ids)
+
+    def lookup_tag(self, tag):
+        """Return the unique_ids of every node tagged with tag"""
+        return list(self.by_tag.get(tag, []))
+
+    def qualified_name(self, unique_id):
+        node = self.nodes[unique_id]
+        return "{}.{}".format(node["package_name"], node["name"])
+
+    def ambiguous_name_message(self, name, unique_ids):
+        qualified_names = sorted(self.qualified_name(u) for u in unique_ids)
+        return AMBIGUOUS_NAME_MESSAGE.format(
+            name, ", ".join(qualified_names), qualified_names[0]
+        )
@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def map_threaded(func, items, threads):
+    """
+    Call func(*item) for every item on a pool of at most `threads` threads.
+    Returns a list of (item, result, exception) tuples in the order of items,
+    so callers get deterministic output regardless of which call finished
+    first, and one failing call doesn't abort the others.
+    """
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as executor:
+        futures = [executor.submit(func, *item) for item in items]
+
+    results = []
+    for item, future in zip(items, futures):
+        try:
+            results.append((item, future.result(), None))
+        except Exception as e:
+            results.append((item, None, e))
+    return results
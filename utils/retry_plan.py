@@ -0,0 +1,100 @@
+from collections import namedtuple
+
+# roots: unique_ids that errored, retried first
+# descendants: unique_ids that were skipped, retried once the roots pass
+RetryCluster = namedtuple("RetryCluster", ["roots", "descendants"])
+
+
+def find_clusters(graph, unique_ids, succeeded=()):
+    """
+    Split unique_ids into groups that are connected through edges of graph,
+    either directly or through nodes that aren't in succeeded. Nodes without a
+    run result (such as ephemeral models, which dbt never reports) can sit
+    between an errored model and the models it kept from running, so they
+    have to join their groups too. Groups keep the order of unique_ids, and
+    nodes missing from the graph form a group of their own.
+    """
+    succeeded = set(succeeded)
+    passable = graph.walk(
+        [unique_id for unique_id in unique_ids if unique_id in graph],
+        "downstream",
+        include=lambda unique_id: unique_id not in succeeded,
+    )
+    leader = {unique_id: unique_id for unique_id in unique_ids}
+    leader.update((unique_id, unique_id) for unique_id in passable)
+
+    def find(unique_id):
+        while leader[unique_id] != unique_id:
+            leader[unique_id] = leader[leader[unique_id]]
+            unique_id = leader[unique_id]
+        return unique_id
+
+    for unique_id in passable:
+        for parent in graph.predecessors(unique_id):
+            if parent in passable:
+                leader[find(parent)] = find(unique_id)
+
+    clusters = {}
+    for unique_id in unique_ids:
+        clusters.setdefault(find(unique_id), []).append(unique_id)
+    return list(clusters.values())
+
+
+def get_affected_nodes(graph, errored, skipped, succeeded=()):
+    """
+    Return the skipped unique_ids that are downstream of an errored node.
+    Skipped nodes that aren't affected by any error don't need to be
+    rebuilt. The walk stops at nodes that succeeded, but passes through
+    nodes that have no run result at all, such as ephemeral models.
+    """
+    succeeded = set(succeeded)
+    affected = graph.walk(
+        [unique_id for unique_id in errored if unique_id in graph],
+        "downstream",
+        include=lambda unique_id: unique_id not in succeeded,
+    )
+    return [unique_id for unique_id in skipped if unique_id in affected]
+
+
+def plan_retry(graph, errored, skipped, succeeded=()):
+    """
+    Group the errored and skipped unique_ids into independent RetryClusters
+    (see find_clusters), largest first so the longest retries start as early
+    as possible.
+    """
+    errored_set = set(errored)
+    plan = [
+        RetryCluster(
+            roots=[u for u in cluster if u in errored_set],
+            descendants=[u for u in cluster if u not in errored_set],
+        )
+        for cluster in find_clusters(
+            graph, list(errored) + list(skipped), succeeded
+        )
+    ]
+    return sorted(
+        plan,
+        key=lambda cluster: len(cluster.roots) + len(cluster.descendants),
+        reverse=True,
+    )
+
+
+def chunk_args(args, max_length):
+    """
+    Split args into consecutive batches whose lengths (plus a separator per
+    argument) add up to at most max_length. An argument longer than
+    max_length gets a batch of its own.
+    """
+    batches = []
+    batch = []
+    length = 0
+    for arg in args:
+        if batch and length + len(arg) + 1 > max_length:
+            batches.append(batch)
+            batch = []
+            length = 0
+        batch.append(arg)
+        length += len(arg) + 1
+    if batch:
+        batches.append(batch)
+    return batches
@@ -0,0 +1,178 @@
+import datetime
+import os
+import sqlite3
+
+import utils.run_results
+from utils.lineage import CACHE_DIR
+
+HISTORY_FILE = "run_history.db"
+
+HISTORY_FIELDS = ("unique_id", "status", "skip", "fail", "execution_time", "thread_id")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS runs (
+        run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fingerprint TEXT UNIQUE,
+        generated_at TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS results (
+        run_id INTEGER,
+        unique_id TEXT,
+        name TEXT,
+        status TEXT,
+        execution_time REAL,
+        thread_id TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS results_run_id ON results (run_id)",
+    "CREATE INDEX IF NOT EXISTS results_unique_id ON results (unique_id)",
+)
+
+
+def get_history_path(target_path):
+    return os.path.join(target_path, CACHE_DIR, HISTORY_FILE)
+
+
+def connect(target_path):
+    """Open (creating it if needed) the run history in target/dbt_helper"""
+    history_path = get_history_path(target_path)
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    conn = sqlite3.connect(history_path)
+    for statement in SCHEMA:
+        conn.execute(statement)
+    return conn
+
+
+def ingest_run_results(conn, target_path):
+    """
+    Add the results in target/run_results.json to the history, unless that
+    file has been ingested already. Returns True if a new run was added.
+    Runs are told apart by the mtime and size of the file, which dbt
+    rewrites on every invocation.
+    """
+    stat = os.stat(utils.run_results.get_run_results_path(target_path))
+    fingerprint = "{}:{}".format(stat.st_mtime_ns, stat.st_size)
+    if conn.execute(
+        "SELECT 1 FROM runs WHERE fingerprint = ?", (fingerprint,)
+    ).fetchone():
+        return False
+
+    generated_at = datetime.datetime.fromtimestamp(
+        stat.st_mtime, datetime.timezone.utc
+    ).isoformat()
+    with conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (fingerprint, generated_at) VALUES (?, ?)",
+            (fingerprint, generated_at),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            _iter_result_rows(run_id, target_path),
+        )
+    return True
+
+
+def _iter_result_rows(run_id, target_path):
+    for result in utils.run_results.iter_run_results(
+        target_path, fields=HISTORY_FIELDS
+    ):
+        unique_id = utils.run_results.get_result_unique_id(result)
+        # later dbt versions don't record the node itself; unique_ids end
+        # with the node's name
+        name = result.get("node", {}).get("name") or unique_id.split(".")[-1]
+        yield (
+            run_id,
+            unique_id,
+            name,
+            utils.run_results.get_result_status(result),
+            result.get("execution_time"),
+            result.get("thread_id"),
+        )
+
+
+def get_slowest(conn, limit):
+    """
+    Return (name, execution_time, thread_id, previous average) for the
+    slowest nodes of the latest run, slowest first. Only successful results
+    count: dbt records skipped nodes at 0s and errored ones at the time until
+    the error.
+    """
+    return conn.execute(
+        """
+        SELECT latest.name, latest.execution_time, latest.thread_id,
+            (
+                SELECT AVG(previous.execution_time)
+                FROM results AS previous
+                WHERE previous.unique_id = latest.unique_id
+                    AND previous.run_id < latest.run_id
+                    AND previous.status = 'success'
+            )
+        FROM results AS latest
+        WHERE latest.run_id = (SELECT MAX(run_id) FROM runs)
+            AND latest.status = 'success'
+            AND latest.execution_time IS NOT NULL
+        ORDER BY latest.execution_time DESC
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+
+
+def get_regressions(conn, window, threshold, limit):
+    """
+    Return (name, execution_time, previous average) for the nodes that took
+    at least threshold times longer in the latest run than on average over
+    the window previous runs, largest slowdown first. Nodes that previously
+    averaged 0s have no meaningful slowdown and are left out.
+    """
+    return conn.execute(
+        """
+        WITH latest_run AS (SELECT MAX(run_id) AS run_id FROM runs),
+        previous_runs AS (
+            SELECT run_id FROM runs
+            WHERE run_id < (SELECT run_id FROM latest_run)
+            ORDER BY run_id DESC
+            LIMIT ?
+        ),
+        previous AS (
+            SELECT unique_id, AVG(execution_time) AS average
+            FROM results
+            WHERE run_id IN previous_runs AND status = 'success'
+            GROUP BY unique_id
+        )
+        SELECT latest.name, latest.execution_time, previous.average
+        FROM results AS latest
+        JOIN previous ON previous.unique_id = latest.unique_id
+        WHERE latest.run_id = (SELECT run_id FROM latest_run)
+            AND latest.status = 'success'
+            AND previous.average > 0
+            AND latest.execution_time > previous.average * ?
+        ORDER BY latest.execution_time - previous.average DESC
+        LIMIT ?
+        """,
+        (window, threshold, limit),
+    ).fetchall()
+
+
+def get_failure_counts(conn, window, limit):
+    """
+    Return (name, failures, runs) for the nodes that errored or failed most
+    often over the latest window runs
+    """
+    return conn.execute(
+        """
+        WITH recent_runs AS (
+            SELECT run_id FROM runs ORDER BY run_id DESC LIMIT ?
+        )
+        SELECT name,
+            SUM(CASE WHEN status IN ('error', 'fail') THEN 1 ELSE 0 END)
+                AS failures,
+            COUNT(*) AS runs
+        FROM results
+        WHERE run_id IN recent_runs
+        GROUP BY unique_id
+        HAVING failures > 0
+        ORDER BY failures DESC, runs ASC, name
+        LIMIT ?
+        """,
+        (window, limit),
+    ).fetchall()
@@ -0,0 +1,66 @@
+import os
+
+from utils.json_stream import JsonStream, read_fields
+
+RUN_RESULTS_FILE = "run_results.json"
+
+RESULT_FIELDS = ("unique_id", "status", "skip", "fail")
+NODE_FIELDS = ("unique_id", "name")
+
+
+def get_run_results_path(target_path):
+    return os.path.join(target_path, RUN_RESULTS_FILE)
+
+
+def iter_run_results(target_path, fields=RESULT_FIELDS, node_fields=NODE_FIELDS):
+    """
+    Stream the run_results.json file and yield one record per result, holding
+    only the requested fields of the result and, under "node", the requested
+    fields of its node. Compiled SQL, timing and adapter responses are skipped
+    without being decoded, so memory stays flat however many nodes ran.
+
+    dbt 0.17 nests the node under each result, while later versions only
+    record its unique_id, so records may have either.
+    """
+    try:
+        f = open(get_run_results_path(target_path))
+    except IOError:
+        raise Exception("Could not find {} file.".format(RUN_RESULTS_FILE))
+
+    with f:
+        stream = JsonStream(f)
+        for key in stream.iter_object():
+            if key != "results":
+                stream.skip_value()
+                continue
+            for _ in stream.iter_array():
+                record = {}
+                for result_key in stream.iter_object():
+                    if result_key == "node" and stream.peek() == "{":
+                        record["node"] = read_fields(stream, node_fields)
+                    elif result_key in fields:
+                        record[result_key] = stream.read_value()
+                    else:
+                        stream.skip_value()
+                yield record
+            return
+
+
+def get_result_unique_id(result):
+    return result.get("unique_id") or result["node"]["unique_id"]
+
+
+def get_result_status(result):
+    """
+    Return "error", "skipped", "fail" or "success" for a result. dbt 0.17
+    reports errors as "ERROR" and marks skipped nodes and failed tests with
+    flags, while later versions report lowercase statuses.
+    """
+    status = str(result.get("status")).lower()
+    if status == "error":
+        return "error"
+    if result.get("skip") or status == "skipped":
+        return "skipped"
+    if result.get("fail") or status == "fail":
+        return "fail"
+    return "success"
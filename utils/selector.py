@@ -0,0 +1,65 @@
+import math
+import os
+import re
+from collections import namedtuple
+
+UNLIMITED = math.inf
+METHODS = ("name", "tag", "path")
+
+SELECTOR = re.compile(
+    r"^(?:(?P<parents>\d*)\+)?(?P<spec>[^+]+?)(?:\+(?P<children>\d*))?$"
+)
+
+# method: one of METHODS
+# value: the model name, tag or path
+# parents / children: None if the selector has no "+" on that side, else the
+# maximum number of generations to follow (UNLIMITED for a bare "+")
+Selector = namedtuple("Selector", ["method", "value", "parents", "children"])
+
+
+def _parse_depth(depth):
+    if depth is None:
+        return None
+    return int(depth) if depth else UNLIMITED
+
+
+def parse_selector(selector):
+    """
+    Parse a dbt-style node selector: a model name, "tag:<tag>" or
+    "path:<path>", optionally prefixed with "+" / "N+" (its parents) and/or
+    suffixed with "+" / "+N" (its children).
+    """
+    match = SELECTOR.match(selector)
+    if match is None:
+        raise Exception("Invalid selector: '{}'".format(selector))
+
+    method, _, value = match.group("spec").rpartition(":")
+    method = method or "name"
+    if method not in METHODS:
+        raise Exception(
+            "Invalid selector: '{}'. Expected a model name, tag:<tag> or "
+            "path:<path>".format(selector)
+        )
+
+    return Selector(
+        method=method,
+        value=value,
+        parents=_parse_depth(match.group("parents")),
+        children=_parse_depth(match.group("children")),
+    )
+
+
+def select_by_path(nodes, path):
+    """
+    Return the unique_ids of the nodes whose file is path or lives under it.
+    Like dbt, path is resolved against the current directory.
+    """
+    path = os.path.abspath(path)
+    prefix = os.path.join(path, "")
+
+    unique_ids = []
+    for unique_id, node in nodes.items():
+        file_path = os.path.join(node["root_path"], node["original_file_path"])
+        if file_path == path or file_path.startswith(prefix):
+            unique_ids.append(unique_id)
+    return unique_ids